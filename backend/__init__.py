@@ -0,0 +1,8 @@
+"""AI Study Assistant backend package."""
+
+import os
+
+__version__ = "0.3.0"
+
+# Absolute path of the backend/ directory (notes and index data live here)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
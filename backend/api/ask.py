@@ -1,22 +1,21 @@
 import os
-import sys
-from fastapi import APIRouter, Query # type: ignore
-from typing import Optional
+import asyncio
+from fastapi import APIRouter, HTTPException, Query, Request # type: ignore
+from fastapi.responses import StreamingResponse # type: ignore
+from typing import Dict, FrozenSet, Optional
 
 # Define the default course here
 DEFAULT_COURSE = os.getenv("DEFAULT_COURSE", "COMP2123")  # default: "COMP2123"
 
-# Ensure we can import backend modules
-current_dir = os.path.dirname(os.path.abspath(__file__))
-backend_dir = os.path.dirname(current_dir)
-parent_dir = os.path.dirname(backend_dir)
-if parent_dir not in sys.path:
-    sys.path.insert(0, parent_dir)
-
-from backend.rag.qa import answer_question, build_knowledge_base_from_dir
+from backend.rag.qa import (
+    answer_question,
+    answer_question_stream,
+    build_knowledge_base_from_dir,
+)
 from backend.rag.course_manager import (
     list_available_courses,
     get_course_info,
+    get_course_store,
     list_loaded_courses,
     get_course_notes_path,
     get_course_index_path,
@@ -24,22 +23,73 @@ from backend.rag.course_manager import (
 
 router = APIRouter()
 
+# Known course codes (upper-case) and their static info, built once so
+# /courses/{code} validates and answers without touching the filesystem.
+# None until first populated (normally by the app's startup hook).
+_COURSES: Optional[FrozenSet[str]] = None
+_COURSE_INFO: Dict[str, dict] = {}
+
+
+def refresh_course_registry(courses=None) -> FrozenSet[str]:
+    """Rebuild the known-course set and drop cached course info."""
+    global _COURSES
+    if courses is None:
+        courses = list_available_courses()
+    known = {c.upper() for c in courses}
+    known.add(DEFAULT_COURSE.upper())
+    _COURSES = frozenset(known)
+    _COURSE_INFO.clear()
+    return _COURSES
+
+
+async def _require_course(course_code: str) -> str:
+    """Return the normalized course code, or raise 404 if unknown."""
+    courses = _COURSES
+    if courses is None:
+        courses = await asyncio.to_thread(refresh_course_registry)
+    code = course_code.upper()
+    if code not in courses:
+        raise HTTPException(status_code=404, detail=f"Unknown course: {course_code}")
+    return code
+
+# Handlers are async so the event loop stays free; blocking work (FAISS search,
+# file I/O, index rebuilds) is pushed to worker threads explicitly.
+
 # Ask endpoint
 @router.get("/ask")
-def ask(
+async def ask(
     q: str,
     course: Optional[str] = Query(
         None, description=f"Course code (default: {DEFAULT_COURSE})"
     ),
 ):
     """Ask a question about course materials."""
-    return {"answer": answer_question(q, course)}
+    answer = await asyncio.to_thread(answer_question, q, course)
+    return {"answer": answer}
+
+# Streaming ask endpoint: plain-text answer sent as the LLM produces it
+@router.get("/ask/stream")
+async def ask_stream(
+    q: str,
+    course: Optional[str] = Query(
+        None, description=f"Course code (default: {DEFAULT_COURSE})"
+    ),
+):
+    """Ask a question and stream the answer as plain text."""
+    # A sync generator: Starlette iterates it in its threadpool, so
+    # retrieval and the OpenAI stream never block the event loop.
+    return StreamingResponse(
+        answer_question_stream(q, course), media_type="text/plain; charset=utf-8"
+    )
 
 # List all available courses
 @router.get("/courses")
-def list_courses():
+async def list_courses():
     """List all available courses."""
-    available = list_available_courses()
+    available = await asyncio.to_thread(list_available_courses)
+    if _COURSES is None or not {c.upper() for c in available} <= _COURSES:
+        # New course folders appeared: re-sync the registry
+        refresh_course_registry(available)
     loaded = list_loaded_courses()
     return {
         "default_course": DEFAULT_COURSE,
@@ -49,20 +99,41 @@ def list_courses():
 
 # Get information about a specific course
 @router.get("/courses/{course_code}")
-def course_info(course_code: str):
+async def course_info(course_code: str):
     """Get information about a specific course."""
-    info = get_course_info(course_code)
-    return info
+    code = await _require_course(course_code)
+    info = _COURSE_INFO.get(code)
+    if info is None:
+        info = await asyncio.to_thread(get_course_info, code)
+        _COURSE_INFO[code] = info
+    # Load state changes at runtime; read it from memory on every call
+    store = get_course_store(code)
+    return {
+        **info,
+        "loaded": store is not None,
+        "chunk_count": len(store.texts) if store else None,
+    }
 
 # Rebuild the index for a specific course
 @router.post("/courses/{course_code}/reload")
-def reload_course(course_code: str):
+async def reload_course(course_code: str, request: Request):
     """Rebuild the index for a specific course."""
+    # Re-scan first so a newly added notes folder can be reloaded
+    await asyncio.to_thread(refresh_course_registry)
+    await _require_course(course_code)
     notes = get_course_notes_path(course_code)
     index_path = get_course_index_path(course_code)
 
+    # Rebuilds run on their own single-worker executor (created at startup)
+    # so a long rebuild can never starve /ask of threads.
+    loop = asyncio.get_running_loop()
+    executor = getattr(request.app.state, "rebuild_executor", None)
+
     try:
-        build_knowledge_base_from_dir(notes, index_path, course_code)
+        await loop.run_in_executor(
+            executor, build_knowledge_base_from_dir, notes, index_path, course_code
+        )
+        _COURSE_INFO.pop(course_code.upper(), None)
         return {"status": "ok", "course": course_code, "index_path": index_path}
     except Exception as e:
         return {"status": "error", "error": str(e)}
@@ -0,0 +1,118 @@
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import FastAPI  # type: ignore
+from fastapi.middleware.cors import CORSMiddleware # type: ignore
+from dotenv import load_dotenv # type: ignore
+load_dotenv()  # 加载环境变量
+
+# "backend" is importable via the package install (`pip install -e .`),
+# no sys.path changes needed.
+from backend import BASE_DIR
+from backend.config import configure_logging
+from backend.api.ask import router as ask_router, refresh_course_registry
+from backend.rag.qa import build_knowledge_base_from_dir, warm_up
+
+
+# -------------------------------------------------------------------
+# Logging Configuration
+# -------------------------------------------------------------------
+logger = logging.getLogger(__name__)
+configure_logging()
+
+# -------------------------------------------------------------------
+# Shared embedding model (gunicorn --preload)
+# -------------------------------------------------------------------
+# With PRELOAD_EMBEDDER=1 the model is loaded here, in the master process,
+# so forked workers share its weights instead of each loading a copy.
+# Only effective under `gunicorn --preload`; `uvicorn --workers` re-imports
+# the app in every worker.
+if os.getenv("PRELOAD_EMBEDDER", "0") == "1":
+    from backend.rag.embedder import preload_shared_model
+
+    preload_shared_model()
+    logger.info("Embedding model preloaded into shared memory.")
+
+# -------------------------------------------------------------------
+# FastAPI App
+# -------------------------------------------------------------------
+app = FastAPI()
+
+# -------------------------------------------------------------------
+# CORS Middleware Configuration
+# -------------------------------------------------------------------
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],  # 允许所有源访问
+    allow_credentials=True,
+    allow_methods=["*"],  # 允许所有 HTTP 方法
+    allow_headers=["*"],  # 允许所有 HTTP 头
+)
+
+# Add your routes here
+app.include_router(ask_router)
+
+
+# -------------------------------------------------------------------
+# Startup: Load Knowledge Base
+# -------------------------------------------------------------------
+@app.on_event("startup")
+def startup_event():
+    """
+    Load COMP2123 knowledge base at startup using:
+    - Environment variables if provided
+    - Otherwise stable absolute paths (backend/data/... in Render)
+    """
+
+    # Dedicated executor for index rebuilds (/courses/{code}/reload), kept
+    # separate from the default threadpool used by query handlers.
+    app.state.rebuild_executor = ThreadPoolExecutor(
+        max_workers=1, thread_name_prefix="kb-rebuild"
+    )
+
+    # Known courses, so /courses/{code} can validate without a directory scan
+    refresh_course_registry()
+
+    # Absolute fallback paths (Render-safe)
+    default_notes = os.path.join(BASE_DIR, "data/notes/COMP2123")
+    default_index = os.path.join(BASE_DIR, "data/index/comp2123")
+
+    # Log the absolute paths being used for notes and index files
+    logger.info(f"Default notes path: {default_notes}")
+    logger.info(f"Default index path: {default_index}")
+
+    # Try loading from environment variables if set
+    notes_dir = os.getenv("NOTES_DIR", default_notes)
+    index_path = os.getenv("INDEX_PATH", default_index)
+
+    # Log the environment variable values
+    logger.info(f"Loading notes from: {notes_dir}")
+    logger.info(f"Loading index from: {index_path}")
+
+    try:
+        # Attempt to build the knowledge base from the provided paths
+        logger.info("=== AI Study Assistant Startup ===")
+        build_knowledge_base_from_dir(notes_dir, index_path)
+        logger.info("✓ Knowledge base initialized successfully.")
+        if os.getenv("WARM_DEFAULT_INDEX", "1") == "1":
+            warm_up()
+    except Exception as e:
+        logger.error(f"✗ Failed to build knowledge base: {e}", exc_info=True)
+        logger.warning(
+            "Server will continue running but /ask endpoint will NOT be functional."
+        )
+
+
+@app.on_event("shutdown")
+def shutdown_event():
+    executor = getattr(app.state, "rebuild_executor", None)
+    if executor is not None:
+        executor.shutdown(wait=False)
+
+
+# -------------------------------------------------------------------
+# Health Check Endpoint
+# -------------------------------------------------------------------
+@app.get("/health")
+def health():
+    return {"status": "ok"}
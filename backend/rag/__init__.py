@@ -5,9 +5,12 @@ and tools that expect a regular package (avoids ModuleNotFoundError).
 """
 
 __all__ = [
+    "cache",
     "chunker",
     "course_manager",
+    "embed_cache",
     "embedder",
+    "index_files",
     "loader",
     "prompt",
     "qa",
@@ -0,0 +1,112 @@
+"""
+Query caches for the retrieval path.
+
+ProximityCache is an approximate cache keyed on query embeddings: a lookup
+returns the stored value of the closest cached query if its cosine distance
+is within ``tau``, so near-duplicate questions skip the FAISS search.
+"""
+
+import os
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Cosine distance under which two queries are considered the same
+CACHE_TAU = float(os.getenv("CACHE_TAU", "0.05"))
+# Maximum number of cached queries per store
+CACHE_CAPACITY = int(os.getenv("CACHE_CAPACITY", "256"))
+
+
+class ProximityCache:
+    """
+    Bounded LRU cache of (query embedding -> value) with approximate lookup.
+
+    Keys live in one contiguous float32 matrix so a lookup is a single
+    matrix-vector product against all cached (unit-normalized) queries.
+    """
+
+    def __init__(self, capacity: int = CACHE_CAPACITY, tau: float = CACHE_TAU):
+        if capacity <= 0:
+            raise ValueError("The 'capacity' parameter must be a positive integer")
+        self.capacity = capacity
+        self.tau = tau
+        self._keys: Optional[np.ndarray] = None  # (capacity, dim) float32
+        self._values: list = [None] * capacity
+        # slot -> None, ordered from least to most recently used
+        self._lru: "OrderedDict[int, None]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._lru)
+
+    @staticmethod
+    def _normalize(vector) -> Optional[np.ndarray]:
+        q = np.asarray(vector, dtype=np.float32).ravel()
+        norm = float(np.linalg.norm(q))
+        if norm == 0.0:
+            return None
+        return q / norm
+
+    def lookup(self, vector) -> Optional[Any]:
+        """
+        Return the cached value for the nearest query within ``tau``.
+
+        Args:
+            vector: Query embedding.
+
+        Returns:
+            Cached value on a hit, None on a miss.
+        """
+        q = self._normalize(vector)
+        if q is None:
+            return None
+
+        with self._lock:
+            if not self._lru or self._keys is None or self._keys.shape[1] != q.shape[0]:
+                return None
+            slots = np.fromiter(self._lru.keys(), dtype=np.int64, count=len(self._lru))
+            dists = 1.0 - self._keys[slots] @ q
+            best = int(np.argmin(dists))
+            if dists[best] > self.tau:
+                return None
+            slot = int(slots[best])
+            self._lru.move_to_end(slot)
+            return self._values[slot]
+
+    def insert(self, vector, value: Any) -> None:
+        """
+        Cache ``value`` under ``vector``, evicting the LRU entry when full.
+
+        Args:
+            vector: Query embedding.
+            value: Value to return for this (or a nearby) query.
+        """
+        q = self._normalize(vector)
+        if q is None:
+            return
+
+        with self._lock:
+            if self._keys is None or self._keys.shape[1] != q.shape[0]:
+                self._keys = np.zeros((self.capacity, q.shape[0]), dtype=np.float32)
+                self._values = [None] * self.capacity
+                self._lru.clear()
+
+            if len(self._lru) < self.capacity:
+                slot = len(self._lru)
+            else:
+                slot, _ = self._lru.popitem(last=False)
+
+            self._keys[slot] = q
+            self._values[slot] = value
+            self._lru[slot] = None
+
+    def clear(self) -> None:
+        """Drop all cached entries."""
+        with self._lock:
+            self._lru.clear()
+            self._values = [None] * self.capacity
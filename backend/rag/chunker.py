@@ -1,9 +1,11 @@
 def chunk_text(text, chunk_size=500, overlap=50):
+    step = chunk_size - overlap
+    if step <= 0:
+        raise ValueError("'overlap' must be smaller than 'chunk_size'")
+    # split/join run in C; the window stops once it reaches the last word, so
+    # no trailing chunk is just a copy of the previous chunk's overlap.
     words = text.split()
-    chunks = []
-    i = 0
-    while i < len(words):
-        chunk = " ".join(words[i : i + chunk_size])
-        chunks.append(chunk)
-        i += chunk_size - overlap
-    return chunks
+    if not words:
+        return []
+    last = max(len(words) - overlap, 1)
+    return [" ".join(words[i : i + chunk_size]) for i in range(0, last, step)]
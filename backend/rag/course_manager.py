@@ -5,14 +5,20 @@ Handles loading and switching between different course knowledge bases.
 
 import os
 import logging
-from typing import Optional, Dict, List
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional, Dict, List, Set
 
-from backend.rag.vectorstore import VectorStore
+# Path helpers only: importing vectorstore here would pull FAISS and numpy
+# into every CLI command
+from backend.rag.index_files import texts_file_for
+
+if TYPE_CHECKING:
+    from backend.rag.vectorstore import VectorStore
 
 logger = logging.getLogger(__name__)
 
 # In-memory cache of loaded course indexes
-_course_stores: Dict[str, VectorStore] = {}
+_course_stores: Dict[str, "VectorStore"] = {}
 
 # Default course
 DEFAULT_COURSE = os.getenv("DEFAULT_COURSE", "COMP2123")
@@ -21,7 +27,11 @@ DEFAULT_COURSE = os.getenv("DEFAULT_COURSE", "COMP2123")
 NOTES_BASE_DIR = os.getenv("NOTES_BASE_DIR", "data/notes")
 INDEX_BASE_DIR = os.getenv("INDEX_BASE_DIR", "data/index")
 
+# Set once INDEX_BASE_DIR has been created, so path lookups skip the mkdir
+_index_base_ready = False
+
 
+@lru_cache(maxsize=64)
 def get_course_notes_path(course_code: str) -> str:
     """
     Get the notes directory path for a course.
@@ -35,6 +45,7 @@ def get_course_notes_path(course_code: str) -> str:
     return os.path.join(NOTES_BASE_DIR, course_code)
 
 
+@lru_cache(maxsize=64)
 def get_course_index_path(course_code: str) -> str:
     """
     Get the index path prefix for a course.
@@ -45,8 +56,11 @@ def get_course_index_path(course_code: str) -> str:
     Returns:
         Full path prefix for course index files.
     """
-    # Create index directory if it doesn't exist
-    os.makedirs(INDEX_BASE_DIR, exist_ok=True)
+    # Create index directory if it doesn't exist (once per process)
+    global _index_base_ready
+    if not _index_base_ready:
+        os.makedirs(INDEX_BASE_DIR, exist_ok=True)
+        _index_base_ready = True
     return os.path.join(INDEX_BASE_DIR, course_code.lower())
 
 
@@ -70,26 +84,56 @@ def list_available_courses() -> List[str]:
     return sorted(courses)
 
 
-def is_course_indexed(course_code: str) -> bool:
+def list_index_files() -> Set[str]:
+    """
+    Names of the files in INDEX_BASE_DIR, from a single directory read.
+
+    Returns:
+        Set of file names (empty if the directory does not exist).
+    """
+    try:
+        with os.scandir(INDEX_BASE_DIR) as entries:
+            return {e.name for e in entries}
+    except FileNotFoundError:
+        return set()
+
+
+def is_course_indexed(
+    course_code: str, index_files: Set[str] = None, index_path: str = None
+) -> bool:
     """
     Check if a course has a persisted index.
 
     Args:
         course_code: Course code.
+        index_files: Result of list_index_files(); pass it when checking
+            many courses so the directory is read once instead of stat'ing
+            each file per course.
+        index_path: Index path prefix, if not the course's default one
+            (index_files is then ignored, as it lists INDEX_BASE_DIR).
 
     Returns:
         True if index files exist, False otherwise.
     """
-    index_path = get_course_index_path(course_code)
-    index_file = f"{index_path}.index"
-    texts_file = f"{index_path}_texts.pkl"
+    if index_path:
+        index_files = None
+    else:
+        index_path = get_course_index_path(course_code)
+    if index_files is not None:
+        base = os.path.basename(index_path)
+        exists = f"{base}.index" in index_files and (
+            f"{base}_texts.bin" in index_files or f"{base}_texts.pkl" in index_files
+        )
+    else:
+        index_file = f"{index_path}.index"
+        texts_file = texts_file_for(index_path)
+        exists = os.path.exists(index_file) and os.path.exists(texts_file)
 
-    exists = os.path.exists(index_file) and os.path.exists(texts_file)
     logger.debug(f"Course {course_code} indexed: {exists}")
     return exists
 
 
-def get_course_store(course_code: str) -> Optional[VectorStore]:
+def get_course_store(course_code: str) -> Optional["VectorStore"]:
     """
     Get the loaded VectorStore for a course.
     Returns None if not loaded.
@@ -103,7 +147,7 @@ def get_course_store(course_code: str) -> Optional[VectorStore]:
     return _course_stores.get(course_code.upper())
 
 
-def set_course_store(course_code: str, store: VectorStore) -> None:
+def set_course_store(course_code: str, store: "VectorStore") -> None:
     """
     Set the VectorStore for a course in cache.
 
@@ -115,7 +159,7 @@ def set_course_store(course_code: str, store: VectorStore) -> None:
     logger.info(f"Cached course store for {course_code.upper()}")
 
 
-def load_course_store(course_code: str) -> Optional[VectorStore]:
+def load_course_store(course_code: str) -> Optional["VectorStore"]:
     """
     Load a course's VectorStore from disk.
     If already cached, return cached version.
@@ -137,6 +181,8 @@ def load_course_store(course_code: str) -> Optional[VectorStore]:
     index_path = get_course_index_path(course_code)
     logger.info(f"Attempting to load course {course_code_upper} from {index_path}")
 
+    from backend.rag.vectorstore import VectorStore
+
     try:
         vs = VectorStore.load(index_path)
         _course_stores[course_code_upper] = vs
@@ -152,12 +198,13 @@ def load_course_store(course_code: str) -> Optional[VectorStore]:
         return None
 
 
-def get_course_info(course_code: str) -> Dict:
+def get_course_info(course_code: str, index_path: str = None) -> Dict:
     """
     Get information about a course (indexed, chunk count, etc).
 
     Args:
         course_code: Course code.
+        index_path: Index path prefix, if not the course's default one.
 
     Returns:
         Dictionary with course info.
@@ -165,7 +212,7 @@ def get_course_info(course_code: str) -> Dict:
     course_upper = course_code.upper()
     store = get_course_store(course_upper)
     notes_path = get_course_notes_path(course_code)
-    indexed = is_course_indexed(course_code)
+    indexed = is_course_indexed(course_code, index_path=index_path)
 
     info = {
         "course_code": course_upper,
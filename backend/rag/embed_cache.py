@@ -0,0 +1,136 @@
+"""
+Persistent embedding cache.
+
+Vectors are stored in SQLite keyed by sha256("<model>:<text>"), so index
+rebuilds only embed chunks that changed and repeated questions skip the
+encoder across restarts. Vectors are kept as float16 (half the size of
+float32; well below the noise of the unit-norm embeddings) and returned
+as float32.
+"""
+
+import os
+import hashlib
+import logging
+import sqlite3
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .embedder import EMBEDDING_MODEL, embed_texts
+
+logger = logging.getLogger(__name__)
+
+# Process-wide cache for question embeddings (disabled when unset)
+EMBED_CACHE_PATH = os.getenv("EMBED_CACHE_PATH", "")
+
+# Keys per SELECT ... IN (...) to stay under SQLite's variable limit
+_SQL_BATCH = 500
+
+
+class EmbeddingCache:
+    """
+    SQLite-backed (model, text) -> float32 vector cache.
+
+    A connection is opened per call, so one instance can be shared across
+    threads.
+    """
+
+    def __init__(self, path: str, model_name: str = EMBEDDING_MODEL):
+        self.path = path
+        self.model_name = model_name
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings_f16 "
+                "(key TEXT PRIMARY KEY, vec BLOB NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}:{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Look up cached vectors.
+
+        Args:
+            keys: Keys produced by key().
+
+        Returns:
+            Mapping of the keys that were found to their vectors.
+        """
+        found = {}
+        with self._connect() as conn:
+            for i in range(0, len(keys), _SQL_BATCH):
+                batch = keys[i : i + _SQL_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    "SELECT key, vec FROM embeddings_f16 "
+                    f"WHERE key IN ({placeholders})",
+                    batch,
+                )
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float16).astype(
+                        np.float32
+                    )
+        return found
+
+    def put_many(self, keys: List[str], vectors) -> None:
+        """
+        Store vectors under their keys (existing entries are replaced).
+        """
+        vectors = np.asarray(vectors, dtype=np.float16)
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings_f16 (key, vec) VALUES (?, ?)",
+                [(k, v.tobytes()) for k, v in zip(keys, vectors)],
+            )
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts, calling the model only for cache misses.
+
+        Args:
+            texts: Texts to embed.
+
+        Returns:
+            float32 matrix with one row per text, in input order.
+        """
+        keys = [self.key(t) for t in texts]
+        found = self.get_many(keys)
+        # First position of each uncached text, so duplicates embed once
+        first_seen = {}
+        for i, k in enumerate(keys):
+            if k not in found and k not in first_seen:
+                first_seen[k] = i
+        missing = list(first_seen.values())
+
+        if missing:
+            new_vectors = np.asarray(
+                embed_texts([texts[i] for i in missing]), dtype=np.float32
+            )
+            self.put_many([keys[i] for i in missing], new_vectors)
+            for i, vector in zip(missing, new_vectors):
+                found[keys[i]] = vector
+
+        logger.debug(
+            "Embedding cache: %d/%d hits", len(texts) - len(missing), len(texts)
+        )
+        return np.stack([found[k] for k in keys]).astype(np.float32, copy=False)
+
+
+_query_cache: Optional[EmbeddingCache] = None
+
+
+def get_query_cache() -> Optional[EmbeddingCache]:
+    """
+    Return the process-wide question cache, or None if EMBED_CACHE_PATH
+    is not set.
+    """
+    global _query_cache
+    if _query_cache is None and EMBED_CACHE_PATH:
+        _query_cache = EmbeddingCache(EMBED_CACHE_PATH)
+    return _query_cache
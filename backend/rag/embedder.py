@@ -1,18 +1,171 @@
+import os
+import threading
+from functools import lru_cache
+
+import numpy as np
+
+# sentence-transformers model used for chunks and questions
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+# Number of distinct question strings whose embeddings are kept in memory
+QUERY_EMBED_CACHE_SIZE = int(os.getenv("QUERY_EMBED_CACHE_SIZE", "4096"))
+# Sentences per forward pass, and torch device ("cuda", "mps", "cpu");
+# unset lets sentence-transformers pick the best available device
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+EMBED_DEVICE = os.getenv("EMBED_DEVICE") or None
+# Run the model in half precision when it lands on a CUDA device
+EMBED_FP16 = os.getenv("EMBED_FP16", "1") == "1"
+
 _model = None
+_model_lock = threading.Lock()
+# sentence-transformers multi-process pool used by embed_texts while set
+_pool = None
 
 
 def get_model():
     """
     Lazily load the sentence-transformers model to avoid downloads at import.
+
+    Double-checked locking: concurrent first requests load it only once.
     """
     global _model
     if _model is None:
-        from sentence_transformers import SentenceTransformer
+        with _model_lock:
+            if _model is None:
+                from sentence_transformers import SentenceTransformer
 
-        _model = SentenceTransformer("all-MiniLM-L6-v2")
+                model = SentenceTransformer(EMBEDDING_MODEL, device=EMBED_DEVICE)
+                if EMBED_FP16 and model.device.type == "cuda":
+                    # fp16 forward; callers cast results to float32 for FAISS
+                    model.half()
+                _model = model
     return _model
 
 
-def embed_texts(texts):
+def preload_shared_model():
+    """
+    Load the model and move its weights into shared memory.
+
+    Call this in the parent process before workers fork (gunicorn
+    --preload) so every worker maps the same weight pages.
+    """
+    model = get_model()
+    model.share_memory()
+    return model
+
+
+def start_embed_pool(processes: int, threads_per_process: int = None):
+    """
+    Start ``processes`` encoder processes on the model's device; until
+    stop_embed_pool() is called, embed_texts splits its input across them.
+
+    Meant for one-off bulk work such as index builds: each process holds
+    its own copy of the model. ``threads_per_process`` sets the workers'
+    OMP_NUM_THREADS/MKL_NUM_THREADS (read by torch at import), so N
+    workers don't each start one BLAS thread per core.
+    """
+    global _pool
+    model = get_model()
+    if _pool is None:
+        devices = [str(model.device)] * processes
+        if threads_per_process is None:
+            _pool = model.start_multi_process_pool(devices)
+        else:
+            # Spawned workers copy the environment at start; restore ours after
+            names = ("OMP_NUM_THREADS", "MKL_NUM_THREADS")
+            saved = {name: os.environ.get(name) for name in names}
+            os.environ.update({name: str(threads_per_process) for name in names})
+            try:
+                _pool = model.start_multi_process_pool(devices)
+            finally:
+                for name, value in saved.items():
+                    if value is None:
+                        os.environ.pop(name, None)
+                    else:
+                        os.environ[name] = value
+    return _pool
+
+
+def stop_embed_pool():
+    """Shut down the pool started by start_embed_pool(), if any."""
+    global _pool
+    if _pool is not None:
+        from sentence_transformers import SentenceTransformer
+
+        SentenceTransformer.stop_multi_process_pool(_pool)
+        _pool = None
+
+
+def embed_texts(texts, batch_size: int = None):
+    """
+    Embed a list of texts in batches as L2-normalized float32 vectors.
+
+    sentence-transformers sorts a list input by length before batching, so
+    each batch is padded only to its own longest text.
+    """
+    if not isinstance(texts, list):
+        texts = list(texts)
+    model = get_model()
+    if _pool is not None:
+        return np.asarray(
+            model.encode_multi_process(
+                texts,
+                _pool,
+                batch_size=batch_size or EMBED_BATCH_SIZE,
+                normalize_embeddings=True,
+            ),
+            dtype=np.float32,
+        )
+    return model.encode(
+        texts,
+        batch_size=batch_size or EMBED_BATCH_SIZE,
+        convert_to_numpy=True,
+        normalize_embeddings=True,
+        show_progress_bar=False,
+    )
+
+
+def encode_one(text: str) -> np.ndarray:
+    """
+    Embed a single string as a unit float32 vector.
+
+    Runs tokenize + forward directly instead of model.encode, which for one
+    sentence spends most of its time on batching machinery (length sort,
+    per-batch lists, progress handling). The model's own modules (pooling,
+    Normalize) still produce the embedding, so results match encode.
+    """
     model = get_model()
-    return model.encode(texts)
+    if not hasattr(model, "tokenize"):
+        # Not a SentenceTransformer (e.g. a stand-in); use the generic path
+        return np.asarray(embed_texts([text])[0], dtype=np.float32)
+
+    import torch
+
+    features = model.tokenize([text])
+    features = {k: v.to(model.device) for k, v in features.items()}
+    with torch.inference_mode():
+        vector = model(features)["sentence_embedding"][0]
+    vector = vector.float().cpu().numpy()
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm > 0 else vector
+
+
+@lru_cache(maxsize=QUERY_EMBED_CACHE_SIZE)
+def _embed_query_cached(text: str) -> bytes:
+    # ndarrays are not hashable/immutable; cache the raw float32 bytes instead
+    from .embed_cache import get_query_cache
+
+    cache = get_query_cache()
+    if cache is not None:
+        vector = cache.embed([text])[0]
+    else:
+        vector = encode_one(text)
+    return vector.tobytes()
+
+
+def embed_query(text: str) -> np.ndarray:
+    """
+    Embed a single query, skipping the encoder for strings seen before.
+
+    Returns a read-only float32 vector backed by the cached bytes.
+    """
+    return np.frombuffer(_embed_query_cached(text), dtype=np.float32)
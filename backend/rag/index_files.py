@@ -0,0 +1,18 @@
+"""
+On-disk layout of a persisted index, kept free of heavy imports so path
+checks (course listing, CLI status) don't load FAISS or numpy.
+"""
+
+import os
+
+
+def texts_file_for(path_prefix: str) -> str:
+    """
+    Return the texts file for an index prefix, preferring the mmap format
+    over the legacy pickle.
+    """
+    texts_file = f"{path_prefix}_texts.bin"
+    legacy_file = f"{path_prefix}_texts.pkl"
+    if not os.path.exists(texts_file) and os.path.exists(legacy_file):
+        return legacy_file
+    return texts_file
@@ -1,7 +1,22 @@
 import os
 import re
+import mmap
+import logging
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack
+from itertools import repeat
 import fitz  # type: ignore
 
+logger = logging.getLogger(__name__)
+
+# Slide boilerplate patterns, compiled once at import
+_RE_PAGE = re.compile(r"The University of Sydney Page \d+")
+_RE_COPY = re.compile(r"Copyright Regulations 1969.*?notice\.", re.DOTALL)
+_RE_NL = re.compile(r"\n{3,}")
+
+# Text files at least this large are decoded straight from a memory map
+_MMAP_MIN_BYTES = 64 * 1024
+
 
 def _clean_pdf_text(text: str) -> str:
     """
@@ -10,11 +25,11 @@ def _clean_pdf_text(text: str) -> str:
     - collapse excessive newlines
     """
     # Remove "The University of Sydney Page X"
-    text = re.sub(r"The University of Sydney Page \d+", "", text)
+    text = _RE_PAGE.sub("", text)
     # Remove big copyright warning blocks (very rough but ok)
-    text = re.sub(r"Copyright Regulations 1969.*?notice\.", "", text, flags=re.DOTALL)
+    text = _RE_COPY.sub("", text)
     # Collapse 3+ newlines
-    text = re.sub(r"\n{3,}", "\n\n", text)
+    text = _RE_NL.sub("\n\n", text)
     return text.strip()
 
 
@@ -22,30 +37,129 @@ def pdf_to_text(path: str) -> str:
     """
     Extract text from a PDF using PyMuPDF.
     """
-    doc = fitz.open(path)
-    pages = []
-    for page in doc:
-        pages.append(page.get_text("text"))
+    # Context manager closes the document instead of leaking it until GC
+    with fitz.open(path) as doc:
+        return _doc_text(doc)
+
+
+def _doc_text(doc) -> str:
+    # No reading-order sort since chunking re-segments the text anyway
+    n = doc.page_count
+    pages = [""] * n
+    for i in range(n):
+        pages[i] = doc.load_page(i).get_text("text", sort=False)
     raw = "\n\n".join(pages)
     return _clean_pdf_text(raw)
 
 
+def _extract_pdf(path: str, transform=None):
+    text = pdf_to_text(path)
+    return transform(text) if transform is not None else text
+
+
+def _is_pdf(name: str):
+    """
+    True for a PDF note, False for a .txt/.md note, None for anything else.
+    """
+    if name.lower().endswith(".pdf"):
+        return True
+    if name.endswith((".txt", ".md")):
+        return False
+    return None
+
+
+def _decode_text(data) -> str:
+    """
+    Decode a text note's bytes (or any buffer, e.g. an mmap) as UTF-8 with
+    the newline handling of a text-mode read.
+    """
+    text = str(data, "utf-8")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def _read_text(path: str) -> str:
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < _MMAP_MIN_BYTES:
+            return _decode_text(f.read())
+        # Decode from the mapped pages: no intermediate bytes copy of a
+        # multi-MB transcript
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return _decode_text(mm)
+
+
+def iter_texts(folder_path: str, transform=None):
+    """
+    Yield the raw text of each .txt, .md and .pdf file under the folder,
+    one file at a time (sorted by name), so callers never need the whole
+    corpus as one list.
+
+    If ``transform`` is given (a picklable, module-level function such as
+    chunk_text), ``transform(text)`` is yielded instead; for PDFs it runs in
+    the same worker process as the extraction.
+    """
+    files = []  # (filename, full_path, is_pdf)
+    with os.scandir(folder_path) as entries:
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            is_pdf = _is_pdf(entry.name)
+            if is_pdf is not None:
+                files.append((entry.name, entry.path, is_pdf))
+    files.sort()
+
+    # PDF extraction is CPU-bound; spread files across processes. Plain-text
+    # reads are I/O-bound; overlap them in threads. Both maps yield results
+    # in submission order, so file order is preserved.
+    pdf_paths = [path for _, path, is_pdf in files if is_pdf]
+    text_paths = [path for _, path, is_pdf in files if not is_pdf]
+    with ExitStack() as stack:
+        if len(pdf_paths) > 1:
+            workers = min(len(pdf_paths), os.cpu_count() or 1)
+            ex = stack.enter_context(ProcessPoolExecutor(max_workers=workers))
+            pdf_texts = ex.map(_extract_pdf, pdf_paths, repeat(transform))
+        else:
+            pdf_texts = map(_extract_pdf, pdf_paths, repeat(transform))
+        if len(text_paths) > 1:
+            workers = min(32, len(text_paths))
+            ex = stack.enter_context(ThreadPoolExecutor(max_workers=workers))
+            plain_texts = ex.map(_read_text, text_paths)
+        else:
+            plain_texts = map(_read_text, text_paths)
+
+        for filename, full_path, is_pdf in files:
+            logger.debug("Processing file: %s", filename)
+            if is_pdf:
+                yield next(pdf_texts)
+            else:
+                text = next(plain_texts)
+                yield transform(text) if transform is not None else text
+
+    logger.info(f"Loaded {len(files)} files from {folder_path}")
+
+
 def load_texts(folder_path: str):
     """
     Load all .txt, .md, and .pdf files under the given folder.
     Return a list of raw text strings.
     """
+    return list(iter_texts(folder_path))
+
+
+def load_texts_from_bytes(files):
+    """
+    Like load_texts, for files already in memory (e.g. uploads).
+
+    ``files`` maps file names to their contents; filtering, ordering and
+    decoding go through the same helpers as iter_texts.
+    """
     texts = []
-    for filename in os.listdir(folder_path):
-        full_path = os.path.join(folder_path, filename)
-        if not os.path.isfile(full_path):
-            continue
-        print(f"Processing file: {filename}")  # Debug log
-        if filename.lower().endswith(".pdf"):
-            text = pdf_to_text(full_path)
-            texts.append(text)
-        elif filename.endswith(".txt") or filename.endswith(".md"):
-            with open(full_path, "r", encoding="utf-8") as f:
-                texts.append(f.read())
-    print(f"Loaded {len(texts)} files.")  # Debug log
+    for name in sorted(files):
+        is_pdf = _is_pdf(name)
+        if is_pdf:
+            with fitz.open(stream=files[name], filetype="pdf") as doc:
+                texts.append(_doc_text(doc))
+        elif is_pdf is not None:
+            texts.append(_decode_text(files[name]))
     return texts
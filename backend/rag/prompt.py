@@ -1,15 +1,22 @@
-def build_prompt(question, context):
-    joined = "\n\n---\n\n".join(context)
-    return f"""
-You are a helpful study assistant.
-
-Use ONLY the following notes to answer the question.
-If the answer is not found, say: "The notes do not contain this information."
+# Fixed instructions, built once; the prompt is assembled with a single join
+_PROMPT_HEAD = (
+    "You are a helpful study assistant.\n"
+    "\n"
+    "Use ONLY the following notes to answer the question.\n"
+    'If the answer is not found, say: "The notes do not contain this information."\n'
+    "\n"
+    "Notes:\n"
+)
+CHUNK_SEPARATOR = "\n\n---\n\n"
 
-Notes:
-{joined}
 
-Question: {question}
-
-Answer:
-"""
+def build_prompt(question, context):
+    return "".join(
+        (
+            _PROMPT_HEAD,
+            CHUNK_SEPARATOR.join(context),
+            "\n\nQuestion: ",
+            question,
+            "\n\nAnswer:\n",
+        )
+    )
@@ -1,35 +1,90 @@
 import os
+import asyncio
 import logging
+import threading
 from functools import lru_cache
-import fitz  # type: ignore
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import openai
 
+from ..config import MODEL_NAME
+from .index_files import texts_file_for
 from .vectorstore import VectorStore
-from .loader import load_texts
+from .loader import iter_texts
+from .chunker import chunk_text
+from .embedder import embed_query, embed_texts
+from .embed_cache import EmbeddingCache
+from .cache import ProximityCache
+from .prompt import CHUNK_SEPARATOR, build_prompt
+from .token_manager import (
+    RESERVED_TOKENS,
+    estimate_tokens,
+    get_token_limit,
+    truncate_chunks_by_tokens,
+)
+from .course_manager import (
+    DEFAULT_COURSE,
+    get_course_store,
+    load_course_store,
+    set_course_store,
+)
 
 logger = logging.getLogger(__name__)
 
+# Exact (question, course) -> answer cache size
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "1024"))
+
+# Maximum in-flight OpenAI requests for answer_questions
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "10"))
+_async_client = None
+
+# Loaded stores keyed by (notes_path, index_path); lookups are lock-free,
+# only the first load of a key takes the lock.
+_VS: Dict[Tuple[str, str], VectorStore] = {}
+_VS_LOCK = threading.Lock()
+
+# Approximate retrieval caches, one per course
+_retrieval_caches: Dict[str, ProximityCache] = {}
+
+# Semantic answer caches, one per course: a paraphrase within this cosine
+# distance of an answered question reuses its answer (no LLM call)
+ANSWER_CACHE_TAU = float(os.getenv("ANSWER_CACHE_TAU", "0.03"))
+_answer_caches: Dict[str, ProximityCache] = {}
+
+
 # -------------------------------------------------------
 # Load persisted FAISS + text chunks
 # -------------------------------------------------------
 def load_persisted_vectorstore(index_dir: str) -> VectorStore:
-    vs = VectorStore(index_dir)
-    vs.load()  # load FAISS + pkl
-    logger.info(f"[VectorStore] Loaded {len(vs.text_chunks)} text chunks.")
+    vs = VectorStore.load(index_dir)  # mmap FAISS + texts
+    logger.info("[VectorStore] Loaded %d text chunks.", len(vs.texts))
     return vs
 
 
 # -------------------------------------------------------
 # Cached global accessor
 # -------------------------------------------------------
-@lru_cache(maxsize=1)
 def get_vectorstore(notes_path: str, index_path: str) -> VectorStore:
+    key = (notes_path, index_path)
+    vs = _VS.get(key)
+    if vs is not None:
+        return vs
+
+    with _VS_LOCK:
+        vs = _VS.get(key)
+        if vs is None:
+            vs = _load_vectorstore(notes_path, index_path)
+            _VS[key] = vs
+    return vs
 
+
+def _load_vectorstore(notes_path: str, index_path: str) -> VectorStore:
     logger.info("Initializing knowledge base for COMP2123")
-    logger.info(f"Notes dir: {notes_path}")
-    logger.info(f"Index path: {index_path}")
+    logger.info("Notes dir: %s", notes_path)
+    logger.info("Index path: %s", index_path)
 
     index_file = index_path + ".index"
-    text_file = index_path + "_texts.pkl"
+    text_file = texts_file_for(index_path)
 
     if not (os.path.exists(index_file) and os.path.exists(text_file)):
         raise RuntimeError(
@@ -40,56 +95,378 @@ def get_vectorstore(notes_path: str, index_path: str) -> VectorStore:
     return load_persisted_vectorstore(index_path)
 
 
-# -------------------------------------------------------
-# ONLY search, NO embedding, NO LLM
-# -------------------------------------------------------
-def answer_question(question: str, course: str = None):
-    notes_dir = os.getenv("NOTES_DIR", "backend/data/notes/COMP2123")
-    index_dir = os.getenv("INDEX_PATH", "backend/data/index/comp2123")
+def get_retrieval_cache(course_code: str) -> ProximityCache:
+    cache = _retrieval_caches.get(course_code)
+    if cache is None:
+        cache = _retrieval_caches.setdefault(course_code, ProximityCache())
+    return cache
+
 
-    vs = get_vectorstore(notes_dir, index_dir)
+def get_answer_cache(course_code: str) -> ProximityCache:
+    cache = _answer_caches.get(course_code)
+    if cache is None:
+        cache = _answer_caches.setdefault(
+            course_code, ProximityCache(tau=ANSWER_CACHE_TAU)
+        )
+    return cache
 
-    results = vs.search(question, top_k=5)
 
-    response_text = "\n\n".join([r["text"] for r in results])
-    return response_text
+def _resolve_store(course_code: str) -> Optional[VectorStore]:
+    """
+    Find the store for a course: in-memory cache, then its index under
+    INDEX_BASE_DIR, then (default course only) NOTES_DIR/INDEX_PATH.
+    """
+    vs = get_course_store(course_code) or load_course_store(course_code)
+    if vs is None and course_code == DEFAULT_COURSE.upper():
+        notes_dir = os.getenv("NOTES_DIR", "backend/data/notes/COMP2123")
+        index_dir = os.getenv("INDEX_PATH", "backend/data/index/comp2123")
+        try:
+            vs = get_vectorstore(notes_dir, index_dir)
+        except RuntimeError as e:
+            logger.error(str(e))
+            return None
+        set_course_store(course_code, vs)
+    return vs
+
+
+def warm_up(course_code: str = None) -> bool:
+    """
+    Touch a course's store so the first real question does not pay for
+    loading it: resolve (load) the store and run one throwaway search to
+    fault in the mmap'd index pages. Also loads the tiktoken encoding,
+    which may have to download its BPE file on first use.
+
+    Returns:
+        True if the store was found and searched.
+    """
+    estimate_tokens("warm up")
+    course = (course_code or DEFAULT_COURSE).upper()
+    vs = _resolve_store(course)
+    if vs is None:
+        return False
+    vs.search(np.zeros(vs.index.d, dtype=np.float32), top_k=1)
+    logger.info("Warmed up index for %s", course)
+    return True
 
 
 # -------------------------------------------------------
-# On startup, only load index and process PDF files if needed
+# Retrieve relevant chunks, then answer with the LLM
 # -------------------------------------------------------
-def build_knowledge_base_from_dir(notes_path: str, index_path: str):
-    logger.info("Attempting to load persisted index...")
+def _normalize_request(question: str, course_code: str = None):
+    course = (course_code or DEFAULT_COURSE).upper()
+    # Collapse whitespace so trivially different repeats share cache entries
+    question = " ".join(question.split())
+    logger.info("Question for %s: %s", course, question)
+    if _resolve_store(course) is None:
+        logger.error("Knowledge base for %s is not initialized", course)
+        return question, course, (
+            f"Knowledge base for course {course} is not initialized. "
+            f"Run: python scripts/manage_index.py build --course {course}"
+        )
+    return question, course, None
+
+
+def answer_question(question: str, course_code: str = None) -> str:
+    question, course, error = _normalize_request(question, course_code)
+    if error is not None:
+        return error
+
+    # Exact repeats are answered from the LRU without retrieval or the LLM;
+    # the cache is cleared whenever a knowledge base is (re)built.
+    return _answer_cached(question, course)
+
+
+def answer_question_stream(question: str, course_code: str = None):
+    """
+    Yield the answer in pieces as the LLM produces them.
+
+    Retrieval still goes through the embedding and retrieval caches, but
+    the exact answer cache is bypassed since the answer is never complete
+    before it is sent.
+    """
+    question, course, error = _normalize_request(question, course_code)
+    if error is not None:
+        yield error
+        return
+    yield from _stream_completion(_build_answer_prompt(question, course))
+
+
+@lru_cache(maxsize=ANSWER_CACHE_SIZE)
+def _answer_cached(question: str, course: str) -> str:
+    query_vector = embed_query(question)
+    answers = get_answer_cache(course)
+    answer = answers.lookup(query_vector)
+    if answer is not None:
+        logger.debug("Semantic answer cache hit")
+        return answer
+    answer = _complete(_build_answer_prompt(question, course, query_vector))
+    answers.insert(query_vector, answer)
+    return answer
+
+
+async def answer_questions(
+    questions: List[str], course_code: str = None
+) -> List[str]:
+    """
+    Answer several questions for one course concurrently.
+
+    The questions are embedded in one batch and retrieved with one FAISS
+    search (in a worker thread); the completions are issued together
+    through AsyncOpenAI, at most LLM_CONCURRENCY at a time. A failed
+    completion yields an error message in its slot instead of failing the
+    whole batch.
+    """
+    global _async_client
+    if not questions:
+        return []
+    normalized = [_normalize_request(q, course_code) for q in questions]
+    error = normalized[0][2]
+    if error is not None:
+        return [error] * len(questions)
+    course = normalized[0][1]
+    questions = [q for q, _, _ in normalized]
+
+    prompts = await asyncio.to_thread(_build_answer_prompts, questions, course)
+
+    if _async_client is None:
+        _async_client = openai.AsyncOpenAI()
+    semaphore = asyncio.Semaphore(LLM_CONCURRENCY)
+
+    async def _complete_async(prompt: str) -> str:
+        async with semaphore:
+            response = await _async_client.chat.completions.create(
+                model=MODEL_NAME,
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=500,
+            )
+        return response.choices[0].message.content
+
+    results = await asyncio.gather(
+        *[_complete_async(p) for p in prompts], return_exceptions=True
+    )
+    answers = []
+    for result in results:
+        if isinstance(result, Exception):
+            logger.error("OpenAI request failed: %s", result)
+            result = f"OpenAI request failed: {result}"
+        answers.append(result)
+    return answers
+
+
+def _build_answer_prompts(questions: List[str], course: str) -> List[str]:
+    """
+    Prompts for several questions: one embedding batch and one FAISS
+    search over all question vectors.
+    """
+    vs = _resolve_store(course)
+    vectors = embed_texts(questions)
+    texts = vs.texts
+    hits = [
+        ([texts[i] for i in ids.tolist()], vs.chunk_token_counts(ids))
+        for ids in vs.search_ids_batch(vectors, top_k=3)
+    ]
+    return [
+        _build_answer_prompt(q, course, vec, hit)
+        for q, vec, hit in zip(questions, vectors, hits)
+    ]
+
 
+def _build_answer_prompt(
+    question: str, course: str, query_vector=None, hit=None
+) -> str:
+    vs = _resolve_store(course)
+
+    # Embed once (cached per string); near-duplicate questions are served
+    # from the proximity cache without touching FAISS.
+    if query_vector is None:
+        query_vector = embed_query(question)
+    cache = get_retrieval_cache(course)
+    if hit is None:
+        hit = cache.lookup(query_vector)
+        if hit is None:
+            ids, _ = vs.search_ids(query_vector, top_k=3)
+            texts = vs.texts
+            hit = ([texts[i] for i in ids.tolist()], vs.chunk_token_counts(ids))
+            cache.insert(query_vector, hit)
+        else:
+            logger.debug("Retrieval cache hit")
+    else:
+        cache.insert(query_vector, hit)
+    relevant_chunks, token_counts = hit
+    logger.info("Retrieved %d chunks", len(relevant_chunks))
+    return build_prompt(
+        question, _fit_context(question, relevant_chunks, token_counts)
+    )
+
+
+def _fit_context(question: str, chunks, token_counts=None) -> list:
+    """
+    Longest prefix of ``chunks`` that fits the model's context window.
+
+    The budget (model limit minus answer reserve, the template with the
+    question, and the separators between chunks) is computed up front so
+    the prompt is built exactly once.
+    """
+    budget = (
+        get_token_limit(MODEL_NAME)
+        - RESERVED_TOKENS
+        - estimate_tokens(build_prompt(question, []))
+        - estimate_tokens(CHUNK_SEPARATOR) * max(len(chunks) - 1, 0)
+        # Estimating pieces separately can undercount by up to one token
+        # per join, and each chunk adds two joins
+        - 2 * len(chunks)
+    )
+    context = truncate_chunks_by_tokens(chunks, budget, token_counts=token_counts)
+    if len(context) < len(chunks):
+        logger.warning(
+            "Context over budget (%d tokens), kept %d/%d chunks",
+            budget,
+            len(context),
+            len(chunks),
+        )
+    return context
+
+
+def _complete(prompt: str) -> str:
     try:
-        vs = load_persisted_vectorstore(index_path)
-        logger.info("Successfully loaded precomputed index.")
+        response = openai.chat.completions.create(
+            model=MODEL_NAME,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=500,
+        )
     except Exception as e:
-        logger.error(f"Failed loading persisted index: {e}")
+        logger.error("OpenAI request failed: %s", e, exc_info=True)
         raise
+    return response.choices[0].message.content
 
+
+def _stream_completion(prompt: str):
     try:
-        # 遍历目录，加载所有 PDF 文件
-        pdf_files = [f for f in os.listdir(notes_path) if f.endswith(".pdf")]
-        for pdf_file in pdf_files:
-            pdf_path = os.path.join(notes_path, pdf_file)
-            logger.info(f"Processing PDF file: {pdf_path}")
-
-            # 读取 PDF 内容
-            doc = fitz.open(pdf_path)
-            full_text = ""
-            for page_num in range(len(doc)):
-                page = doc.load_page(page_num)
-                full_text += page.get_text("text")  # 获取页面的文本内容
-
-            # 将读取的 PDF 文本添加到索引中
-            logger.info(f"Extracted text from {pdf_file}")
-            # 假设你有一个 add_to_index 方法来将文本添加到索引
-            vs.add([full_text], [pdf_file])
+        response = openai.chat.completions.create(
+            model=MODEL_NAME,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=500,
+            stream=True,
+        )
+        for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    except Exception as e:
+        logger.error("OpenAI request failed: %s", e, exc_info=True)
+        raise
+
+
+# -------------------------------------------------------
+# Streaming build: extract -> chunk -> embed, one batch at a time
+# -------------------------------------------------------
+# Chunks embedded per embed_texts call while building. Batches span file
+# boundaries, so a large value keeps the encoder busy with full
+# EMBED_BATCH_SIZE forward passes while bounding memory.
+EMBEDDING_BATCH_SIZE = int(os.getenv("RAG_EMBEDDING_BATCH_SIZE", "4096"))
+
 
+def iter_chunks(notes_path: str):
+    """
+    Yield chunks file by file; each file's raw text is dropped as soon as
+    it has been chunked. PDFs are chunked inside the extraction workers, so
+    chunking runs in parallel across files.
+    """
+    for i, chunks in enumerate(iter_texts(notes_path, transform=chunk_text)):
+        logger.debug("File %d: %d chunks", i + 1, len(chunks))
+        yield from chunks
+
+
+def _batched(iterable, n: int):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == n:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _build_vectorstore(
+    notes_path: str, index_path: str, index_type: str = None
+) -> VectorStore:
+    """
+    Build a VectorStore from a notes folder without materializing the raw
+    corpus: only one file's text and one batch of chunks are in flight.
+
+    Chunk vectors are cached next to the index, so a rebuild only embeds
+    chunks whose text changed.
+    """
+    embed_cache = EmbeddingCache(f"{index_path}_embeddings.sqlite")
+    vs = None
+    n = 0
+    # Indexes that need training (IVF, SQ) get one add over the whole corpus;
+    # rows are buffered in a float32 matrix that doubles when full. Others
+    # (HNSW, flat) take each batch as it is embedded.
+    buf = None
+    pending = []
+    for batch in _batched(iter_chunks(notes_path), EMBEDDING_BATCH_SIZE):
+        logger.info("Embedding chunks %d+%d", n, len(batch))
+        emb = embed_cache.embed(batch)
+        if vs is None:
+            vs = VectorStore(dim=emb.shape[1], index_type=index_type)
+        if vs.index.is_trained:
+            vs.add(emb, batch)
+            n += len(batch)
+            continue
+
+        m = len(pending)
+        end = m + len(emb)
+        if buf is None:
+            buf = np.empty((max(end, EMBEDDING_BATCH_SIZE), emb.shape[1]), np.float32)
+        elif end > len(buf):
+            grown = np.empty((max(2 * len(buf), end), buf.shape[1]), np.float32)
+            grown[:m] = buf[:m]
+            buf = grown
+        buf[m:end] = emb
+        pending.extend(batch)
+        n += len(batch)
+
+    if vs is None:
+        raise ValueError(f"No chunks found in {notes_path}")
+
+    if pending:
+        logger.info("Training and filling FAISS index... (%d chunks)", n)
+        vs.add(buf[: len(pending)], pending)
+    vs.compact()
+    return vs
+
+
+# -------------------------------------------------------
+# Load the persisted index, or build it from the notes once
+# -------------------------------------------------------
+def build_knowledge_base_from_dir(
+    notes_path: str, index_path: str, course_code: str = None, index_type: str = None
+):
+    course = (course_code or DEFAULT_COURSE).upper()
+    logger.info("Attempting to load persisted index...")
+
+    try:
+        vs = load_persisted_vectorstore(index_path)
+        logger.info("Successfully loaded precomputed index.")
+        if index_type:
+            logger.warning(
+                "Index type %s ignored: kept the existing index at %s",
+                index_type,
+                index_path,
+            )
+    except FileNotFoundError:
+        logger.info("No persisted index at %s; building from notes", index_path)
+        vs = _build_vectorstore(notes_path, index_path, index_type)
+        vs.save(index_path)
     except Exception as e:
-        logger.error(f"Failed processing PDF files: {e}")
+        logger.error("Failed loading persisted index: %s", e)
         raise
 
+    with _VS_LOCK:
+        _VS[(notes_path, index_path)] = vs
+    set_course_store(course, vs)
+    get_retrieval_cache(course).clear()
+    get_answer_cache(course).clear()
+    _answer_cached.cache_clear()
     return True
-
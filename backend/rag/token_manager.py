@@ -1,10 +1,20 @@
 """
 Token management utilities for LLM prompt handling.
-Uses a simple heuristic: 1 token ≈ 4 characters.
-For production use, consider using tiktoken or openai.util.get_encoding.
+Counts exact BPE tokens with tiktoken when it is installed; otherwise uses
+a simple heuristic (1 token ≈ 4 characters).
 """
 
 import logging
+from functools import lru_cache
+
+import numpy as np
+
+from ..config import MODEL_NAME
+
+try:
+    import tiktoken  # type: ignore
+except ImportError:  # optional: fall back to the heuristic
+    tiktoken = None
 
 logger = logging.getLogger(__name__)
 
@@ -24,16 +34,65 @@ TOKEN_LIMITS = {
 RESERVED_TOKENS = 500
 
 
+@lru_cache(maxsize=None)
+def _get_encoding(model: str):
+    """
+    tiktoken encoding for ``model``, or None to use the heuristic.
+
+    The first use downloads the BPE file unless it is already in
+    TIKTOKEN_CACHE_DIR; if that fails (e.g. offline) the heuristic is used
+    for the rest of the process rather than failing every request.
+    """
+    if tiktoken is None:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        logger.warning(f"tiktoken encoding unavailable ({e}); estimating tokens")
+        return None
+
+
+def count_tokens(texts: list, model: str = MODEL_NAME) -> np.ndarray:
+    """
+    Count tokens for many texts at once.
+
+    Args:
+        texts: Texts to count.
+        model: Model whose tokenizer to use (when tiktoken is available).
+
+    Returns:
+        int32 array of token counts, one per text.
+    """
+    enc = _get_encoding(model)
+    if enc is None:
+        return np.fromiter(
+            (_heuristic_tokens(t) for t in texts), dtype=np.int32, count=len(texts)
+        )
+    # One call into the Rust tokenizer for the whole batch
+    tokens = enc.encode_ordinary_batch(list(texts))
+    return np.fromiter((len(t) for t in tokens), dtype=np.int32, count=len(tokens))
+
+
 def estimate_tokens(text: str) -> int:
     """
-    Estimate the number of tokens in a text using simple heuristic.
+    Count the tokens in a text: exact with tiktoken, otherwise estimated.
 
     Args:
         text: The text to estimate tokens for.
 
     Returns:
-        Estimated token count.
+        Token count.
     """
+    enc = _get_encoding(MODEL_NAME)
+    if enc is not None:
+        return len(enc.encode(text, disallowed_special=()))
+    return _heuristic_tokens(text)
+
+
+def _heuristic_tokens(text: str) -> int:
     # Simple heuristic: count words and characters
     # More accurate would be to use tiktoken
     word_count = len(text.split())
@@ -63,7 +122,7 @@ def get_token_limit(model: str) -> int:
 
 
 def truncate_chunks_by_tokens(
-    chunks: list, max_tokens: int, preserve_order: bool = True
+    chunks: list, max_tokens: int, preserve_order: bool = True, token_counts=None
 ) -> list:
     """
     Truncate a list of text chunks to fit within a token limit.
@@ -75,6 +134,7 @@ def truncate_chunks_by_tokens(
         chunks: List of text chunks to truncate.
         max_tokens: Maximum number of tokens allowed.
         preserve_order: If True, keep chunks in original order.
+        token_counts: Precomputed token count per chunk (counted if omitted).
 
     Returns:
         Truncated list of chunks that fit within the token limit.
@@ -82,55 +142,16 @@ def truncate_chunks_by_tokens(
     if not chunks:
         return []
 
-    selected_chunks = []
-    total_tokens = 0
-
-    for i, chunk in enumerate(chunks):
-        chunk_tokens = estimate_tokens(chunk)
-
-        if total_tokens + chunk_tokens <= max_tokens:
-            selected_chunks.append(chunk)
-            total_tokens += chunk_tokens
-        else:
-            logger.debug(
-                f"Reached token limit after {i} chunks. "
-                f"Total tokens: {total_tokens}/{max_tokens}"
-            )
-            break
-
-    return selected_chunks
-
-
-def is_prompt_safe(prompt: str, model: str) -> tuple[bool, dict]:
-    """
-    Check if a prompt is safe to send to an LLM API.
-
-    Args:
-        prompt: The full prompt text.
-        model: Model name (e.g., "gpt-4o-mini").
-
-    Returns:
-        Tuple of (is_safe: bool, info: dict with token count and limit).
-    """
-    token_limit = get_token_limit(model)
-    estimated_tokens = estimate_tokens(prompt)
-
-    # Reserve tokens for response generation
-    available_tokens = token_limit - RESERVED_TOKENS
-    is_safe = estimated_tokens <= available_tokens
-
-    info = {
-        "estimated_tokens": estimated_tokens,
-        "token_limit": token_limit,
-        "reserved_tokens": RESERVED_TOKENS,
-        "available_tokens": available_tokens,
-        "is_safe": is_safe,
-    }
-
-    if not is_safe:
-        logger.warning(
-            f"Prompt may exceed token limit for {model}: "
-            f"{estimated_tokens} tokens > {available_tokens} available tokens"
+    if token_counts is None:
+        token_counts = count_tokens(chunks)
+    # Longest prefix whose running total stays within the budget
+    totals = np.cumsum(token_counts)
+    n = int(np.searchsorted(totals, max_tokens, side="right"))
+    if n < len(chunks):
+        used = int(totals[n - 1]) if n else 0
+        logger.debug(
+            f"Reached token limit after {n} chunks. "
+            f"Total tokens: {used}/{max_tokens}"
         )
 
-    return is_safe, info
+    return list(chunks[:n])
@@ -1,11 +1,66 @@
 import faiss  # type: ignore
+import contextlib
 import numpy as np
 import pickle
 import os
+import mmap
+import struct
 import logging
+from collections.abc import Sequence
+import queue
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+
+from .index_files import texts_file_for
+from .token_manager import count_tokens
 
 logger = logging.getLogger(__name__)
 
+# Index layout for newly built stores: "hnsw" (default), "hnsw_sq8", "sq8",
+# "ivf_flat", "ivf_sq8", "ivf_pq" or "flat"
+INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "hnsw").lower()
+# Optional faiss.index_factory spec (e.g. "IVF256,PQ16"); overrides INDEX_TYPE
+INDEX_FACTORY = os.getenv("VECTORSTORE_INDEX_FACTORY", "")
+
+# HNSW graph parameters: M links per node, build/search beam widths
+HNSW_M = int(os.getenv("FAISS_HNSW_M", "32"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("FAISS_HNSW_EF_CONSTRUCTION", "200"))
+HNSW_EF_SEARCH = int(os.getenv("FAISS_HNSW_EF_SEARCH", "64"))
+# Below this many vectors a flat scan beats walking the HNSW graph
+HNSW_MIN_VECTORS = int(os.getenv("FAISS_HNSW_MIN_VECTORS", "2000"))
+
+# IVF parameters: number of inverted lists and lists probed per query
+IVF_NLIST = int(os.getenv("FAISS_IVF_NLIST", "64"))
+IVF_NPROBE = int(os.getenv("FAISS_IVF_NPROBE", "8"))
+# ivf_flat gets ~sqrt(N) lists, so it probes more of them than the quantized IVF types
+IVF_FLAT_NPROBE = int(os.getenv("FAISS_IVF_FLAT_NPROBE", "16"))
+# Below this many vectors ivf_flat builds a flat index instead
+IVF_MIN_VECTORS = int(os.getenv("FAISS_IVF_MIN_VECTORS", "10000"))
+# Product quantization: sub-vectors per vector (must divide dim), 8 bits each
+PQ_M = int(os.getenv("FAISS_PQ_M", "48"))
+
+# Copy indexes to GPU 0 when FAISS was built with GPU support
+USE_GPU = os.getenv("FAISS_USE_GPU", "0") == "1"
+_gpu_resources = None
+
+# Coalesce concurrent searches: wait up to this many ms for more queries
+# (0 disables batching) and search at most SEARCH_BATCH_SIZE at once
+SEARCH_BATCH_WINDOW_MS = float(os.getenv("SEARCH_BATCH_WINDOW_MS", "0"))
+SEARCH_BATCH_SIZE = int(os.getenv("SEARCH_BATCH_SIZE", "32"))
+
+# OpenMP threads per FAISS call. Requests already search concurrently from
+# the server's threadpool, so capping this avoids oversubscribing cores
+# (unset keeps FAISS's default of one thread per core).
+OMP_THREADS = int(os.getenv("FAISS_OMP_THREADS", "0"))
+if OMP_THREADS > 0:
+    faiss.omp_set_num_threads(OMP_THREADS)
+
+# Cosine similarity as inner product over unit vectors. FAISS stores the
+# metric in the index file, so older L2 indexes keep working after load.
+METRIC = faiss.METRIC_INNER_PRODUCT
+
 def ensure_abs(path_prefix: str) -> str:
     """
     Render 部署最关键的修复：
@@ -13,16 +68,286 @@ def ensure_abs(path_prefix: str) -> str:
     """
     return os.path.abspath(path_prefix)
 
+def _new_index(dim: int, n_vectors: int = None, index_type: str = None):
+    """
+    Create an empty FAISS index of ``index_type`` (default INDEX_TYPE).
+
+    For IVF the number of lists is capped by the training set size
+    (FAISS wants ~39 points per list), so small courses still train.
+    A VECTORSTORE_INDEX_FACTORY spec is used verbatim.
+    """
+    if INDEX_FACTORY:
+        index = faiss.index_factory(dim, INDEX_FACTORY, METRIC)
+        if hasattr(index, "hnsw"):
+            index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        return index
+    index_type = (index_type or INDEX_TYPE).lower()
+    if index_type == "flat":
+        return faiss.IndexFlatIP(dim)
+    if index_type == "sq8":
+        # Exhaustive scan over 8-bit codes: a quarter of flat's memory
+        # traffic with near-identical ranking; trained on the first add
+        return faiss.IndexScalarQuantizer(
+            dim, faiss.ScalarQuantizer.QT_8bit, METRIC
+        )
+    if index_type == "hnsw_sq8":
+        # HNSW graph over 8-bit codes: sublinear search at a quarter of the
+        # vector memory; the quantizer is trained on the first add
+        index = faiss.IndexHNSWSQ(dim, faiss.ScalarQuantizer.QT_8bit, HNSW_M, METRIC)
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        return index
+    if index_type == "ivf_flat":
+        if n_vectors is not None and n_vectors < IVF_MIN_VECTORS:
+            # Too few vectors for clustering to beat one BLAS scan
+            return faiss.IndexFlatIP(dim)
+        nlist = IVF_NLIST
+        if n_vectors is not None:
+            # ~sqrt(N) lists balances centroid scan against list scan
+            nlist = max(1, min(int(np.sqrt(n_vectors)), n_vectors // 39))
+        quantizer = faiss.IndexFlatIP(dim)
+        return faiss.IndexIVFFlat(quantizer, dim, nlist, METRIC)
+    if index_type == "ivf_pq":
+        if n_vectors is not None and n_vectors < IVF_MIN_VECTORS:
+            # PQ codebooks need ~10k training points; below that 8-bit
+            # scalar codes still compress (4x) and train on any count
+            logger.info(
+                f"ivf_pq needs {IVF_MIN_VECTORS} vectors, got {n_vectors}: using sq8"
+            )
+            return _new_index(dim, n_vectors, index_type="sq8")
+        if dim % PQ_M:
+            raise ValueError(f"FAISS_PQ_M={PQ_M} does not divide dimension {dim}")
+        nlist = IVF_NLIST
+        if n_vectors is not None:
+            nlist = max(1, min(IVF_NLIST, n_vectors // 39))
+        quantizer = faiss.IndexFlatIP(dim)
+        # PQ codes are PQ_M bytes per vector (vs. 4 * dim for float32)
+        return faiss.IndexIVFPQ(quantizer, dim, nlist, PQ_M, 8, METRIC)
+    if index_type == "ivf_sq8":
+        nlist = IVF_NLIST
+        if n_vectors is not None:
+            nlist = max(1, min(IVF_NLIST, n_vectors // 39))
+        quantizer = faiss.IndexFlatIP(dim)
+        # 8-bit scalar quantization: 4x smaller codes than float32
+        return faiss.IndexIVFScalarQuantizer(
+            quantizer, dim, nlist, faiss.ScalarQuantizer.QT_8bit, METRIC
+        )
+    if index_type != "hnsw":
+        logger.warning(f"Unknown FAISS index type '{index_type}', using hnsw")
+    # HNSW graph: O(log N) search instead of a flat linear scan
+    index = faiss.IndexHNSWFlat(dim, HNSW_M, METRIC)
+    index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    return index
+
+def _configure_search(index) -> None:
+    """
+    Apply query-time parameters to a freshly built or loaded index.
+    """
+    if hasattr(index, "hnsw"):
+        index.hnsw.efSearch = HNSW_EF_SEARCH
+    if hasattr(index, "nprobe"):
+        ivf_flat_types = tuple(
+            getattr(faiss, name) for name in ("IndexIVFFlat", "GpuIndexIVFFlat")
+            if hasattr(faiss, name)
+        )
+        if isinstance(index, ivf_flat_types):
+            index.nprobe = IVF_FLAT_NPROBE
+        else:
+            index.nprobe = IVF_NPROBE
+
+def _maybe_to_gpu(index):
+    """
+    Return a GPU copy of the index if FAISS_USE_GPU=1 and a GPU is visible,
+    else the index unchanged. Types without a GPU implementation (HNSW)
+    stay on the CPU.
+    """
+    global _gpu_resources
+    if not USE_GPU or not hasattr(faiss, "StandardGpuResources"):
+        return index
+    if faiss.get_num_gpus() == 0:
+        return index
+    try:
+        if _gpu_resources is None:
+            _gpu_resources = faiss.StandardGpuResources()
+        return faiss.index_cpu_to_gpu(_gpu_resources, 0, index)
+    except Exception as e:
+        logger.warning(f"Keeping FAISS index on CPU ({e})")
+        return index
+
+def _unit_rows(vectors: np.ndarray) -> np.ndarray:
+    """
+    L2-normalize rows for inner-product search. The embedder already emits
+    unit vectors, so those are returned as-is without a copy.
+    """
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    if np.allclose(norms, 1.0, atol=1e-4):
+        return vectors
+    return vectors / np.maximum(norms, 1e-12)
+
+# Texts file layout: magic, <u64 n>, <u64 offsets[n + 1]>, UTF-8 blob
+TEXTS_MAGIC = b"VSTEXT01"
+_U64 = struct.Struct("<Q")
+
+def write_texts_file(texts_file: str, texts) -> None:
+    """
+    Write chunks as one UTF-8 blob plus an offset table (see MmapTexts).
+
+    The file is written next to its target and renamed into place, so a
+    crash or full disk never leaves a truncated texts file (which loads
+    would prefer over an intact legacy pickle) and readers that still map
+    the old file keep a consistent view.
+    """
+    encoded = [t.encode("utf-8") for t in texts]
+    offsets = np.zeros(len(encoded) + 1, dtype="<u8")
+    if encoded:
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    tmp_file = f"{texts_file}.tmp"
+    try:
+        with open(tmp_file, "wb") as f:
+            f.write(TEXTS_MAGIC)
+            f.write(_U64.pack(len(encoded)))
+            f.write(offsets.tobytes())
+            f.write(b"".join(encoded))
+        os.replace(tmp_file, texts_file)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_file)
+        raise
+
+class MmapTexts(Sequence):
+    """
+    Read-only, memory-mapped view of a texts file written by write_texts_file.
+
+    Opening only maps the file; a chunk is decoded when it is indexed, so
+    load time and RSS do not grow with the corpus and worker processes
+    share the same page cache copy.
+    """
+
+    def __init__(self, texts_file: str):
+        with open(texts_file, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = len(TEXTS_MAGIC)
+        if self._mm[:header] != TEXTS_MAGIC:
+            self._mm.close()
+            raise ValueError(f"Not a texts file: {texts_file}")
+        (self._n,) = _U64.unpack_from(self._mm, header)
+        start = header + _U64.size
+        self._offsets = np.frombuffer(
+            self._mm, dtype="<u8", count=self._n + 1, offset=start
+        )
+        self._blob_start = start + (self._n + 1) * _U64.size
+
+    def __len__(self) -> int:
+        return self._n
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._n))]
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError("text index out of range")
+        lo = self._blob_start + int(self._offsets[i])
+        hi = self._blob_start + int(self._offsets[i + 1])
+        return self._mm[lo:hi].decode("utf-8")
+
+    def __iter__(self):
+        for i in range(self._n):
+            yield self[i]
+
+class SearchBatcher:
+    """
+    Micro-batcher that fuses searches from concurrent request threads into
+    one ``search_fn(queries, top_k)`` call.
+
+    A daemon thread takes the first waiting query, collects more for up to
+    ``window_ms`` (or until ``max_batch``), searches them together and hands
+    each caller its own row. ``search_fn`` is held weakly, so the batcher
+    never keeps its store alive; the thread exits on close().
+    """
+
+    def __init__(
+        self,
+        search_fn,
+        max_batch: int = SEARCH_BATCH_SIZE,
+        window_ms: float = SEARCH_BATCH_WINDOW_MS,
+    ):
+        self._search_ref = weakref.WeakMethod(search_fn)
+        self.max_batch = max_batch
+        self.window = window_ms / 1000.0
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(
+            target=self._run, name="faiss-batcher", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, query: np.ndarray, top_k: int):
+        """
+        Search one (1, d) query; blocks until its batch has run.
+
+        Returns:
+            (distances, indices) rows of length top_k.
+        """
+        future = Future()
+        self._queue.put((query, top_k, future))
+        return future.result()
+
+    def close(self):
+        """Stop the worker thread once queued searches have run."""
+        self._queue.put(None)
+
+    def _run(self):
+        closed = False
+        while not closed:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    closed = True
+                    break
+                batch.append(item)
+
+            queries = np.vstack([q for q, _, _ in batch])
+            top_k = max(k for _, k, _ in batch)
+            search = self._search_ref()
+            try:
+                if search is None:
+                    raise RuntimeError("VectorStore was closed")
+                distances, indices = search(queries, top_k)
+            except Exception as e:
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+            finally:
+                # Don't hold the store while waiting for the next query
+                del search
+            for row, (_, k, future) in enumerate(batch):
+                future.set_result((distances[row, :k], indices[row, :k]))
+
 class VectorStore:
     """
     Simple FAISS-backed vector store with optional persistence.
 
     Files created by save(path_prefix):
       - <path_prefix>.index
-      - <path_prefix>_texts.pkl
+      - <path_prefix>_texts.bin  (memory-mapped on load; older indexes
+        with <path_prefix>_texts.pkl are still readable)
+      - <path_prefix>_tokens.npy  (int32 token count per chunk, aligned
+        with texts; recounted on demand for indexes saved without it)
     """
 
-    def __init__(self, dim=None, index=None, texts=None):
+    def __init__(
+        self, dim=None, index=None, texts=None, token_counts=None, index_type=None
+    ):
         if index is not None:
             self.index = index
             try:
@@ -35,29 +360,150 @@ class VectorStore:
                 raise ValueError("Either 'dim' or 'index' must be provided")
             if not isinstance(dim, int) or dim <= 0:
                 raise ValueError("The 'dim' parameter must be a positive integer")
-            self.index = faiss.IndexFlatL2(dim)  # 创建 FAISS 索引
+            self.index = _new_index(dim, index_type=index_type)
 
+        self.index = _maybe_to_gpu(self.index)
+        _configure_search(self.index)
         self.texts = texts or []
+        if token_counts is None and not len(self.texts):
+            token_counts = np.zeros(0, dtype=np.int32)
+        self.token_counts = token_counts
+        # Layout to rebuild with when an untrained index gets its first add
+        self._index_type = index_type
+        self._batcher = None
+        if SEARCH_BATCH_WINDOW_MS > 0:
+            self._batcher = SearchBatcher(self._search_many)
+            # Stop the worker when a replaced store is garbage-collected
+            weakref.finalize(self, self._batcher.close)
+
+    def close(self):
+        """
+        Stop this store's search batcher thread, if any. Optional: it also
+        stops on its own once the store is garbage-collected.
+        """
+        if self._batcher is not None:
+            self._batcher.close()
+            self._batcher = None
 
     def add(self, vectors, chunks):
         """
         Add vectors and their associated text chunks to the vector store.
         """
-        if len(vectors) == 0 or len(vectors[0]) != self.index.d:
-            raise ValueError(f"Vector dimension mismatch. Expected {self.index.d}, got {len(vectors[0])}")
-        vectors = np.array(vectors).astype("float32")
+        # One contiguous (n, d) float32 matrix handed straight to FAISS; no
+        # copy when the embedder already produced float32 rows.
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or len(vectors) == 0 or vectors.shape[1] != self.index.d:
+            raise ValueError(
+                f"Vector dimension mismatch. Expected {self.index.d}, "
+                f"got shape {vectors.shape}"
+            )
+        if self.index.metric_type == faiss.METRIC_INNER_PRODUCT:
+            vectors = _unit_rows(vectors)
+        if not isinstance(self.texts, list):
+            # Loaded stores hold read-only mmap texts; materialize to extend
+            self.texts = list(self.texts)
+        if not self.index.is_trained:
+            # Untrained means empty: rebuild sized to this batch, then train
+            self.index = _new_index(
+                self.index.d, len(vectors), index_type=self._index_type
+            )
+            try:
+                self.index.train(vectors)
+            except RuntimeError as e:
+                raise ValueError(
+                    f"Cannot train index on {len(vectors)} vectors ({e}); "
+                    "use a smaller IVF/PQ spec or FAISS_INDEX_TYPE=flat"
+                ) from e
+            self.index = _maybe_to_gpu(self.index)
+            _configure_search(self.index)
         self.index.add(vectors)
         self.texts.extend(chunks)
+        if self.token_counts is not None:
+            self.token_counts = np.concatenate(
+                [self.token_counts, count_tokens(chunks)]
+            )
+
+    def compact(self):
+        """
+        Call once a build is complete: a small HNSW index is swapped for a
+        flat one, which is faster (and exact) below HNSW_MIN_VECTORS.
+        Explicit VECTORSTORE_INDEX_FACTORY specs are left alone.
+        """
+        index = self.index
+        if INDEX_FACTORY or not isinstance(index, faiss.IndexHNSWFlat):
+            return
+        if index.ntotal >= HNSW_MIN_VECTORS:
+            return
+        flat = faiss.IndexFlat(index.d, index.metric_type)
+        if index.ntotal:
+            flat.add(index.reconstruct_n(0, index.ntotal))
+        self.index = _maybe_to_gpu(flat)
+        _configure_search(self.index)
+        logger.info(f"[VectorStore] {flat.ntotal} vectors: using a flat index")
+
+    def search_ids(self, query_vector, top_k=3):
+        """
+        Return (indices, scores) of the top_k nearest chunks: cosine
+        similarity for inner-product indexes, squared L2 for older ones.
+
+        Indices point into self.texts; FAISS's -1 padding (fewer than top_k
+        vectors in the index) is dropped.
+        """
+        # One contiguous (1, d) float32 row: no copy when the embedder already
+        # returns float32, and FAISS scores it in a single BLAS/SIMD pass.
+        query = np.ascontiguousarray(query_vector, dtype=np.float32).reshape(1, -1)
+        if self._batcher is not None:
+            distances, indices = self._batcher.submit(query, top_k)
+        else:
+            distances, indices = self._search_many(query, top_k)
+            distances, indices = distances[0], indices[0]
+        keep = (indices >= 0) & (indices < len(self.texts))
+        return indices[keep], distances[keep]
+
+    def search_ids_batch(self, query_vectors, top_k=3):
+        """
+        Batched search_ids: one index.search over an (nq, d) matrix, which
+        FAISS parallelizes across queries.
+
+        Returns:
+            One array of indices into self.texts per query.
+        """
+        queries = np.ascontiguousarray(query_vectors, dtype=np.float32)
+        queries = queries.reshape(-1, self.index.d)
+        _, indices = self._search_many(queries, top_k)
+        n = len(self.texts)
+        return [row[(row >= 0) & (row < n)] for row in indices]
+
+    def _search_many(self, queries: np.ndarray, top_k: int):
+        if self.index.metric_type == faiss.METRIC_INNER_PRODUCT:
+            queries = _unit_rows(queries)
+        return self.index.search(queries, top_k)
+
+    def chunk_token_counts(self, indices) -> np.ndarray:
+        """
+        Token counts for the chunks at ``indices`` (as from search_ids).
+        """
+        if self.token_counts is not None:
+            return np.asarray(self.token_counts[indices], dtype=np.int32)
+        return count_tokens([self.texts[i] for i in indices])
 
     def search(self, query_vector, top_k=3):
         """
         Perform a search for the top_k most similar vectors to the query.
         """
-        query_vector = np.array([query_vector]).astype("float32")
-        _, indices = self.index.search(query_vector, top_k)
+        indices, _ = self.search_ids(query_vector, top_k)
+        texts = self.texts
+        return [texts[i] for i in indices.tolist()]
+
+    def search_batch(self, query_vectors, top_k=3):
+        """
+        Perform one search for several queries; returns a list of chunk
+        lists, one per query.
+        """
+        texts = self.texts
         return [
-            self.texts[i] for i in indices[0]
-            if i is not None and i < len(self.texts)
+            [texts[i] for i in row.tolist()]
+            for row in self.search_ids_batch(query_vectors, top_k)
         ]
 
     def save(self, path_prefix: str):
@@ -69,11 +515,15 @@ class VectorStore:
         os.makedirs(os.path.dirname(path_prefix), exist_ok=True)
 
         index_file = f"{path_prefix}.index"
-        texts_file = f"{path_prefix}_texts.pkl"
+        texts_file = f"{path_prefix}_texts.bin"
 
-        faiss.write_index(self.index, index_file)
-        with open(texts_file, "wb") as f:
-            pickle.dump(self.texts, f)
+        index = self.index
+        if hasattr(faiss, "GpuIndex") and isinstance(index, faiss.GpuIndex):
+            index = faiss.index_gpu_to_cpu(index)
+        faiss.write_index(index, index_file)
+        write_texts_file(texts_file, self.texts)
+        if self.token_counts is not None:
+            np.save(f"{path_prefix}_tokens.npy", self.token_counts)
 
         logger.info(f"[VectorStore] Saved index to {index_file}")
         logger.info(f"[VectorStore] Saved texts to {texts_file}")
@@ -86,7 +536,7 @@ class VectorStore:
         path_prefix = ensure_abs(path_prefix)
 
         index_file = f"{path_prefix}.index"
-        texts_file = f"{path_prefix}_texts.pkl"
+        texts_file = texts_file_for(path_prefix)
 
         logger.info(f"[VectorStore] Attempting to load index at: {index_file}")
         logger.info(f"[VectorStore] Attempting to load texts at: {texts_file}")
@@ -95,13 +545,38 @@ class VectorStore:
             raise FileNotFoundError(f"Index or texts file not found at: {path_prefix}")
 
         try:
-            index = faiss.read_index(index_file)
+            # mmap: pages fault in on demand and are shared across workers
+            index = faiss.read_index(
+                index_file, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+            )
         except Exception as e:
-            logger.error(f"Error loading FAISS index: {e}")
-            raise
+            logger.warning(f"mmap load failed ({e}), reading index into memory")
+            try:
+                index = faiss.read_index(index_file)
+            except Exception as e:
+                logger.error(f"Error loading FAISS index: {e}")
+                raise
 
-        with open(texts_file, "rb") as f:
-            texts = pickle.load(f)
+        if texts_file.endswith(".pkl"):
+            # Large read buffer so unpickling streams from memory, not syscalls
+            with open(texts_file, "rb", buffering=1 << 20) as f:
+                texts = pickle.load(f)
+            # Migrate once so later loads are mmap'd and never unpickle
+            try:
+                write_texts_file(f"{path_prefix}_texts.bin", texts)
+                logger.info(f"[VectorStore] Converted {texts_file} to _texts.bin")
+            except OSError as e:
+                logger.warning(f"Could not convert legacy texts file: {e}")
+        else:
+            texts = MmapTexts(texts_file)
+
+        tokens_file = f"{path_prefix}_tokens.npy"
+        token_counts = None
+        if os.path.exists(tokens_file):
+            token_counts = np.load(tokens_file, mmap_mode="r")
+            if len(token_counts) != len(texts):
+                logger.warning(f"Ignoring stale token counts in {tokens_file}")
+                token_counts = None
 
         try:
             dim = index.d
@@ -115,4 +590,4 @@ class VectorStore:
         logger.info(f"[VectorStore] Successfully loaded FAISS index (dim={dim})")
         logger.info(f"[VectorStore] Loaded {len(texts)} text chunks")
 
-        return cls(dim=dim, index=index, texts=texts)
+        return cls(dim=dim, index=index, texts=texts, token_counts=token_counts)
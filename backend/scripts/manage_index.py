@@ -17,29 +17,75 @@ Examples:
 import argparse
 import os
 import sys
+from functools import lru_cache
 
-from backend.rag.qa import build_knowledge_base_from_dir
+from backend.config import configure_logging
 from backend.rag.course_manager import (
     get_course_notes_path,
     get_course_index_path,
     is_course_indexed,
     list_available_courses,
+    list_index_files,
     get_course_info,
+    get_course_store,
+    set_course_store,
     DEFAULT_COURSE,
 )
-from backend.rag.vectorstore import VectorStore
 
 
 def remove_index_files(path_prefix: str):
-    files = [f"{path_prefix}.index", f"{path_prefix}_texts.pkl"]
+    files = [
+        f"{path_prefix}.index",
+        f"{path_prefix}_texts.bin",
+        f"{path_prefix}_texts.pkl",
+        f"{path_prefix}_tokens.npy",
+    ]
+    # Just try the unlink: one syscall per file and no check-then-remove race
     removed = []
     for f in files:
-        if os.path.exists(f):
+        try:
             os.remove(f)
-            removed.append(f)
+        except FileNotFoundError:
+            continue
+        removed.append(f)
     return removed
 
 
+# --quant choices -> FAISS_INDEX_TYPE presets
+QUANT_INDEX_TYPES = {"none": "hnsw", "sq8": "sq8", "pq": "ivf_pq"}
+
+# Rough single-process CPU embedding throughput (chunks/s) per model, for
+# --dry-run estimates; EMBED_CHUNKS_PER_SEC overrides it (e.g. on a GPU)
+EMBED_THROUGHPUT = {"all-MiniLM-L6-v2": 200.0}
+
+
+def estimate_build(notes: str, jobs: int = 1):
+    """
+    Chunk the notes without embedding and print the projected embed time.
+    """
+    # Loader and chunker only (the same pass qa.iter_chunks makes): no
+    # FAISS, OpenAI or model imports for an estimate
+    from backend.rag.chunker import chunk_text
+    from backend.rag.embedder import EMBEDDING_MODEL
+    from backend.rag.loader import iter_texts
+
+    n_chunks = 0
+    n_chars = 0
+    for chunks in iter_texts(notes, transform=chunk_text):
+        n_chunks += len(chunks)
+        n_chars += sum(map(len, chunks))
+    rate = float(os.getenv("EMBED_CHUNKS_PER_SEC", "0")) or EMBED_THROUGHPUT.get(
+        EMBEDDING_MODEL, 200.0
+    )
+    seconds = n_chunks / (rate * max(1, jobs))
+    print(f"  Chunks: {n_chunks} ({n_chars} characters)")
+    print(
+        f"  Estimated embedding time: ~{seconds:.0f}s at {rate:.0f} chunks/s "
+        f"x {max(1, jobs)} process(es); cached chunks are skipped, so "
+        "rebuilds are faster"
+    )
+
+
 def cmd_build(args):
     course_code = args.course or DEFAULT_COURSE
     notes = args.notes or get_course_notes_path(course_code)
@@ -49,21 +95,85 @@ def cmd_build(args):
         print(f"Error: Notes folder not found: {notes}")
         sys.exit(1)
 
+    # Before any thread settings or heavy imports: an estimate has no
+    # side effects
+    if args.dry_run:
+        print(f"Dry run for course: {course_code}")
+        print(f"  Notes folder: {notes}")
+        estimate_build(notes, args.jobs)
+        return
+
+    # Builds own the machine: use every core for training, adds and the
+    # embedding BLAS, whatever FAISS_OMP_THREADS caps searches at. OpenMP
+    # and MKL read these variables once, at import, so they are set before
+    # the deferred imports below (explicit user settings win).
+    threads = int(os.getenv("FAISS_BUILD_THREADS", "0")) or os.cpu_count() or 1
+    os.environ.setdefault("OMP_NUM_THREADS", str(threads))
+    os.environ.setdefault("MKL_NUM_THREADS", str(threads))
+
+    # Deferred: qa pulls in openai, PyMuPDF and the embedder stack, which
+    # list/status never need
+    import faiss  # type: ignore
+
+    from backend.rag.embedder import start_embed_pool, stop_embed_pool
+    from backend.rag.qa import build_knowledge_base_from_dir
+
+    faiss.omp_set_num_threads(threads)
+
     if args.force:
         removed = remove_index_files(index_path)
         if removed:
             print("Removed existing files:", ", ".join(removed))
+    elif args.quant and os.path.exists(f"{index_path}.index"):
+        print(
+            f"Warning: --quant {args.quant} ignored: an index already exists "
+            "and will be reused; add --force to rebuild it"
+        )
 
     print(f"Building index for course: {course_code}")
     print(f"  Notes folder: {notes}")
     print(f"  Index path: {index_path}")
+    index_type = QUANT_INDEX_TYPES[args.quant] if args.quant else None
+    if index_type:
+        print(f"  Index type: {index_type}")
 
     try:
-        build_knowledge_base_from_dir(notes, index_path, course_code)
+        if args.jobs > 1:
+            # Split the cores between workers instead of giving each all of them
+            per_worker = max(1, threads // args.jobs)
+            print(
+                f"  Embedding processes: {args.jobs} "
+                f"({per_worker} thread(s) each)"
+            )
+            start_embed_pool(args.jobs, per_worker)
+        build_knowledge_base_from_dir(notes, index_path, course_code, index_type)
         print(f"✓ Build completed. Index saved at: {index_path}")
+        store = get_course_store(course_code)
+        if store is not None:
+            # May differ from the requested type (small-corpus fallbacks)
+            print(f"  Index built: {type(store.index).__name__}")
     except Exception as e:
         print(f"✗ Build failed: {e}")
         sys.exit(2)
+    finally:
+        # Always reap the worker processes, including on a failed build
+        stop_embed_pool()
+
+
+@lru_cache(maxsize=8)
+def _load_store(index_path, mtime_ns):
+    from backend.rag.vectorstore import VectorStore
+
+    return VectorStore.load(index_path)
+
+
+def load_store(index_path):
+    """
+    Load the store at ``index_path``, reusing the one already loaded in
+    this process unless the .index file has been rewritten since.
+    """
+    mtime_ns = os.stat(f"{index_path}.index").st_mtime_ns
+    return _load_store(index_path, mtime_ns)
 
 
 def cmd_load(args):
@@ -71,7 +181,9 @@ def cmd_load(args):
     index_path = args.index_path or get_course_index_path(course_code)
 
     try:
-        vs = VectorStore.load(index_path)
+        vs = load_store(index_path)
+        # Visible to a later cmd_status in the same process
+        set_course_store(course_code, vs)
         try:
             ntotal = int(vs.index.ntotal)
         except Exception:
@@ -90,12 +202,34 @@ def cmd_load(args):
         sys.exit(2)
 
 
+def _files_size(paths):
+    total = 0
+    for path in paths:
+        try:
+            total += os.stat(path).st_size
+        except FileNotFoundError:
+            pass
+    return total
+
+
 def cmd_status(args):
     course_code = args.course or DEFAULT_COURSE
+    index_path = args.index_path or get_course_index_path(course_code)
 
-    info = get_course_info(course_code)
+    info = get_course_info(course_code, index_path)
     print(f"Course: {course_code}")
     print(f"  Indexed: {'Yes' if info['indexed'] else 'No'}")
+    if info["indexed"]:
+        # Sizes come from stat alone; the store is only read with --verbose
+        size = _files_size(
+            f"{index_path}{suffix}"
+            for suffix in (".index", "_texts.bin", "_texts.pkl", "_tokens.npy")
+        )
+        print(f"  Index size: {size / 1024 / 1024:.1f} MiB")
+    if args.verbose and info["indexed"] and not info["loaded"]:
+        vs = load_store(index_path)
+        set_course_store(course_code, vs)
+        info = get_course_info(course_code, index_path)
     print(f"  Loaded: {'Yes' if info['loaded'] else 'No'}")
     if info["loaded"]:
         print(f"  Chunks: {info['chunk_count']}")
@@ -110,10 +244,14 @@ def cmd_list(args):
     if not courses:
         print("  (no courses found in data/notes/)")
     else:
+        index_files = list_index_files()
+        lines = []
         for course in courses:
-            indexed = "✓" if is_course_indexed(course) else " "
+            indexed = "✓" if is_course_indexed(course, index_files) else " "
             default = " (default)" if course == DEFAULT_COURSE else ""
-            print(f"  [{indexed}] {course}{default}")
+            lines.append(f"  [{indexed}] {course}{default}\n")
+        # One write instead of a print (and TTY flush) per course
+        sys.stdout.write("".join(lines))
 
 
 def build_parser():
@@ -139,6 +277,24 @@ def build_parser():
         action="store_true",
         help="Remove existing index files before building",
     )
+    b.add_argument(
+        "--quant",
+        choices=sorted(QUANT_INDEX_TYPES),
+        default=None,
+        help="Vector encoding: none (float32 HNSW), sq8 (int8 codes, 4x smaller) "
+        "or pq (IVF-PQ) (default: FAISS_INDEX_TYPE)",
+    )
+    b.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Embedding processes (each loads its own model copy; default: 1)",
+    )
+    b.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only chunk the notes and print the chunk count and estimated time",
+    )
     b.set_defaults(func=cmd_build)
 
     load = sub.add_parser("load", help="Attempt to load existing index and print stats")
@@ -153,6 +309,11 @@ def build_parser():
         "--course", default=None, help=f"Course code (default: {DEFAULT_COURSE})"
     )
     s.add_argument("--index-path", default=None, help="Path prefix for index files")
+    s.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Also load the index to report its chunk count",
+    )
     s.set_defaults(func=cmd_status)
 
     ls = sub.add_parser("list", help="List all available courses")
@@ -161,9 +322,10 @@ def build_parser():
     return p
 
 
-def main():
+def main(argv=None):
+    configure_logging()
     p = build_parser()
-    args = p.parse_args()
+    args = p.parse_args(argv)
     if not args.cmd:
         p.print_help()
         return
@@ -4,6 +4,56 @@ Kept intentionally minimal. Package install (e.g. `pip install -e .`)
 is the recommended way to make `rag` importable in test/CI environments.
 """
 
+from types import SimpleNamespace
+
+import pytest
+
+
 def pytest_sessionstart(session):
     # no-op: keep conftest present for pytest hooks if needed in future
     return
+
+
+@pytest.fixture
+def fake_models(monkeypatch):
+    """
+    Replace the embedding model and the OpenAI clients with offline fakes.
+
+    Sync completions answer "DUMMY ANSWER" (or stream "DUMMY ", "STREAM");
+    async completions echo the first two characters of the question and
+    fail for questions starting with "bad".
+    """
+    import backend.rag.embedder as embedder
+    import backend.rag.qa as qa_module
+
+    class DummyModel:
+        def encode(self, texts, **kwargs):
+            return [[0.1] * 8 for _ in texts]
+
+    monkeypatch.setattr(embedder, "get_model", lambda: DummyModel())
+
+    def fake_create(*args, **kwargs):
+        if kwargs.get("stream"):
+            return iter(
+                SimpleNamespace(
+                    choices=[SimpleNamespace(delta=SimpleNamespace(content=c))]
+                )
+                for c in ["DUMMY ", None, "STREAM"]
+            )
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="DUMMY ANSWER"))]
+        )
+
+    monkeypatch.setattr(qa_module.openai.chat.completions, "create", fake_create)
+
+    async def fake_acreate(*args, **kwargs):
+        question = kwargs["messages"][0]["content"].split("Question: ")[1]
+        if question.startswith("bad"):
+            raise RuntimeError("boom")
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=question[:2]))]
+        )
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace()))
+    client.chat.completions.create = fake_acreate
+    monkeypatch.setattr(qa_module, "_async_client", client)
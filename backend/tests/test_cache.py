@@ -0,0 +1,24 @@
+from backend.rag.cache import ProximityCache
+
+
+def test_proximity_cache_hits_near_duplicate_query():
+    cache = ProximityCache(capacity=4, tau=0.05)
+    cache.insert([1.0, 0.0, 0.0], ["chunk a"])
+
+    # Nearly the same direction -> hit; orthogonal -> miss
+    assert cache.lookup([0.99, 0.01, 0.0]) == ["chunk a"]
+    assert cache.lookup([0.0, 1.0, 0.0]) is None
+
+
+def test_proximity_cache_evicts_least_recently_used():
+    cache = ProximityCache(capacity=2, tau=0.01)
+    cache.insert([1.0, 0.0], "x")
+    cache.insert([0.0, 1.0], "y")
+    # Touch "x" so "y" becomes the LRU entry
+    assert cache.lookup([1.0, 0.0]) == "x"
+    cache.insert([-1.0, 0.0], "z")
+
+    assert len(cache) == 2
+    assert cache.lookup([0.0, 1.0]) is None
+    assert cache.lookup([1.0, 0.0]) == "x"
+    assert cache.lookup([-1.0, 0.0]) == "z"
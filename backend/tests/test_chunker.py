@@ -15,3 +15,13 @@ def test_chunker_overlap_and_sizes():
     second = chunks[1].split()
     # The last 50 words of first should equal the first 50 of second
     assert first[-50:] == second[:50]
+
+
+def test_chunker_skips_overlap_only_tail():
+    text = " ".join(f"w{i}" for i in range(950))
+
+    chunks = chunk_text(text, chunk_size=500, overlap=50)
+
+    # 0-500 and 450-950 cover everything; 900-950 would only repeat the overlap
+    assert len(chunks) == 2
+    assert chunks[-1].split()[-1] == "w949"
@@ -1,11 +1,15 @@
 import os
-from types import SimpleNamespace
+import asyncio
 
-from backend.rag.qa import build_knowledge_base_from_dir, answer_question
-import backend.rag.embedder as embedder
+from backend.rag.qa import (
+    answer_question,
+    answer_question_stream,
+    answer_questions,
+    build_knowledge_base_from_dir,
+)
 
 
-def test_build_and_query_integration(tmp_path, monkeypatch):
+def test_build_and_query_integration(tmp_path, fake_models):
     notes_dir = tmp_path / "notes"
     notes_dir.mkdir()
     (notes_dir / "n1.txt").write_text("This is a test note. " * 200, encoding="utf-8")
@@ -13,23 +17,6 @@ def test_build_and_query_integration(tmp_path, monkeypatch):
     index_path = str(tmp_path / "index" / "testcourse")
     os.makedirs(os.path.dirname(index_path), exist_ok=True)
 
-    # Monkeypatch embedder model to avoid heavy downloads
-    class DummyModel:
-        def encode(self, texts):
-            return [[0.1] * 8 for _ in texts]
-
-    monkeypatch.setattr(embedder, "get_model", lambda: DummyModel())
-
-    # Monkeypatch openai completion to avoid network calls
-    import backend.rag.qa as qa_module
-
-    def fake_create(*args, **kwargs):
-        return SimpleNamespace(
-            choices=[SimpleNamespace(message=SimpleNamespace(content="DUMMY ANSWER"))]
-        )
-
-    monkeypatch.setattr(qa_module.openai.chat.completions, "create", fake_create)
-
     # Build the knowledge base for this test course
     build_knowledge_base_from_dir(
         str(notes_dir), index_path=index_path, course_code="TESTCOURSE"
@@ -38,3 +25,34 @@ def test_build_and_query_integration(tmp_path, monkeypatch):
     # Query the course
     ans = answer_question("what is testing?", course_code="TESTCOURSE")
     assert "DUMMY ANSWER" in ans
+
+
+def test_answer_question_stream(tmp_path, fake_models):
+    notes_dir = tmp_path / "notes"
+    notes_dir.mkdir()
+    (notes_dir / "n1.txt").write_text("Streaming note. " * 50, encoding="utf-8")
+    index_path = str(tmp_path / "index" / "streamcourse")
+
+    build_knowledge_base_from_dir(
+        str(notes_dir), index_path=index_path, course_code="STREAMCOURSE"
+    )
+
+    pieces = list(answer_question_stream("what?", course_code="STREAMCOURSE"))
+    assert pieces == ["DUMMY ", "STREAM"]
+
+
+def test_answer_questions_concurrently(tmp_path, fake_models):
+    notes_dir = tmp_path / "notes"
+    notes_dir.mkdir()
+    (notes_dir / "n1.txt").write_text("Batch note. " * 50, encoding="utf-8")
+    index_path = str(tmp_path / "index" / "batchcourse")
+
+    build_knowledge_base_from_dir(
+        str(notes_dir), index_path=index_path, course_code="BATCHCOURSE"
+    )
+
+    answers = asyncio.run(
+        answer_questions(["q1?", "bad?", "q3?"], course_code="BATCHCOURSE")
+    )
+    assert answers[0] == "q1" and answers[2] == "q3"
+    assert "boom" in answers[1]
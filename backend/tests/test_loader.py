@@ -1,4 +1,4 @@
-from backend.rag.loader import load_texts
+from backend.rag.loader import load_texts, load_texts_from_bytes
 
 
 def test_load_texts_reads_txt_files(tmp_path, monkeypatch):
@@ -13,3 +13,21 @@ def test_load_texts_reads_txt_files(tmp_path, monkeypatch):
     assert isinstance(texts, list)
     assert len(texts) == 1
     assert content in texts[0]
+
+
+def test_load_texts_from_bytes_filters_and_orders_like_folder():
+    texts = load_texts_from_bytes(
+        {"b.md": b"# Second", "a.txt": "Caf\u00e9".encode("utf-8"), "c.png": b"\x89PNG"}
+    )
+    assert texts == ["Caf\u00e9", "# Second"]
+
+
+def test_crlf_notes_match_between_disk_and_memory(tmp_path):
+    data = "Line one\r\nLine two\rLine three\n".encode("utf-8")
+    notes_dir = tmp_path / "notes"
+    notes_dir.mkdir()
+    (notes_dir / "a.txt").write_bytes(data)
+
+    expected = ["Line one\nLine two\nLine three\n"]
+    assert load_texts(str(notes_dir)) == expected
+    assert load_texts_from_bytes({"a.txt": data}) == expected
@@ -0,0 +1,236 @@
+import logging
+import os
+import subprocess
+import sys
+
+import faiss
+import numpy as np
+import pytest
+
+from backend.rag import course_manager
+
+
+@pytest.fixture(autouse=True)
+def isolated_cli_state(monkeypatch):
+    """
+    main() runs in-process here: undo what a build changes process-wide
+    (thread env vars, FAISS's OpenMP threads, root logging handlers).
+    """
+    for name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+        # setenv records the original (possibly absent) value for undo
+        monkeypatch.setenv(name, "")
+        monkeypatch.delenv(name)
+    faiss_threads = faiss.omp_get_max_threads()
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    yield
+    faiss.omp_set_num_threads(faiss_threads)
+    root.handlers[:] = handlers
+    root.setLevel(level)
+
+
+def test_import_does_not_load_faiss():
+    # Run in a fresh interpreter: this test process has FAISS loaded already
+    code = (
+        "import sys, backend.scripts.manage_index; "
+        "print('faiss' in sys.modules, 'numpy' in sys.modules)"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert out.stdout.split() == ["False", "False"]
+
+
+def _notes(tmp_path):
+    notes_dir = tmp_path / "notes"
+    notes_dir.mkdir()
+    (notes_dir / "n1.txt").write_text("Quantized note. " * 300, encoding="utf-8")
+    return str(notes_dir)
+
+
+def test_build_quant_selects_index_type(tmp_path, fake_models, capsys):
+    import faiss
+
+    from backend.rag import vectorstore
+    from backend.scripts.manage_index import main
+
+    index_path = str(tmp_path / "index" / "qtest")
+    before = vectorstore.INDEX_TYPE
+    build = ["build", "--course", "QTEST", "--notes", _notes(tmp_path)]
+    main(build + ["--index-path", index_path, "--quant", "sq8"])
+
+    index = faiss.read_index(f"{index_path}.index")
+    assert isinstance(index, faiss.IndexScalarQuantizer)
+    assert vectorstore.INDEX_TYPE == before
+
+    # Without --force the existing index is reused, and the user is told
+    main(build + ["--index-path", index_path, "--quant", "pq"])
+    assert "--quant pq ignored" in capsys.readouterr().out
+    index = faiss.read_index(f"{index_path}.index")
+    assert isinstance(index, faiss.IndexScalarQuantizer)
+
+
+@pytest.fixture
+def course_dirs(tmp_path, monkeypatch):
+    notes_base = tmp_path / "notes_base"
+    index_base = tmp_path / "index_base"
+    for course in ("AB", "CD"):
+        (notes_base / course).mkdir(parents=True)
+    monkeypatch.setattr(course_manager, "NOTES_BASE_DIR", str(notes_base))
+    monkeypatch.setattr(course_manager, "INDEX_BASE_DIR", str(index_base))
+    course_manager.get_course_notes_path.cache_clear()
+    course_manager.get_course_index_path.cache_clear()
+    yield index_base
+    course_manager.get_course_notes_path.cache_clear()
+    course_manager.get_course_index_path.cache_clear()
+    course_manager.clear_course_cache()
+
+
+def _save_store(prefix):
+    from backend.rag.vectorstore import VectorStore
+
+    vs = VectorStore(dim=4)
+    vs.add(np.eye(4, dtype=np.float32), ["a", "b", "c", "d"])
+    vs.save(prefix)
+
+
+def test_list_marks_indexed_courses(course_dirs, capsys):
+    from backend.scripts.manage_index import main
+
+    _save_store(str(course_dirs / "ab"))
+    main(["list"])
+
+    out = capsys.readouterr().out
+    assert "Available courses (2):" in out
+    assert "  [✓] AB\n" in out
+    assert "  [ ] CD\n" in out
+
+
+def test_status_honours_index_path(course_dirs, tmp_path, capsys):
+    from backend.scripts.manage_index import main
+
+    custom = str(tmp_path / "elsewhere" / "ab")
+    _save_store(custom)
+
+    main(["status", "--course", "AB"])
+    out = capsys.readouterr().out
+    assert "Indexed: No" in out and "Index size" not in out
+
+    main(["status", "--course", "AB", "--index-path", custom, "--verbose"])
+    out = capsys.readouterr().out
+    assert "Indexed: Yes" in out
+    assert "Index size:" in out
+    assert "Chunks: 4" in out
+
+
+def test_build_quant_pq_falls_back_to_sq8_for_small_courses(
+    tmp_path, fake_models, capsys, monkeypatch
+):
+    from backend.rag import vectorstore
+    from backend.scripts.manage_index import main
+
+    # PQ_M must divide the fake model's 8 dimensions
+    monkeypatch.setattr(vectorstore, "PQ_M", 4)
+    index_path = str(tmp_path / "index" / "pqtest")
+    main(
+        ["build", "--course", "PQTEST", "--notes", _notes(tmp_path)]
+        + ["--index-path", index_path, "--quant", "pq"]
+    )
+
+    index = faiss.read_index(f"{index_path}.index")
+    assert isinstance(index, faiss.IndexScalarQuantizer)
+    assert "Index built: IndexScalarQuantizer" in capsys.readouterr().out
+
+
+def test_build_jobs_stops_pool_when_build_fails(tmp_path, monkeypatch):
+    from backend.rag import embedder, qa
+    from backend.scripts.manage_index import main
+
+    calls = []
+    monkeypatch.setattr(
+        embedder, "start_embed_pool", lambda n, t: calls.append(("start", n))
+    )
+    monkeypatch.setattr(embedder, "stop_embed_pool", lambda: calls.append("stop"))
+
+    def failing_build(*args, **kwargs):
+        raise RuntimeError("embedding failed")
+
+    monkeypatch.setattr(qa, "build_knowledge_base_from_dir", failing_build)
+
+    index_path = str(tmp_path / "index" / "jobs")
+    with pytest.raises(SystemExit) as exc:
+        main(
+            ["build", "--notes", _notes(tmp_path), "--index-path", index_path]
+            + ["--jobs", "3"]
+        )
+
+    assert exc.value.code == 2
+    assert calls == [("start", 3), "stop"]
+
+
+def test_build_dry_run_estimates_without_writing(tmp_path, capsys):
+    from backend.scripts.manage_index import main
+
+    index_dir = tmp_path / "index"
+    index_dir.mkdir()
+    main(
+        ["build", "--notes", _notes(tmp_path), "--index-path", str(index_dir / "dry")]
+        + ["--dry-run"]
+    )
+
+    out = capsys.readouterr().out
+    assert "Chunks: 2 " in out
+    assert "Estimated embedding time: ~" in out
+    assert list(index_dir.iterdir()) == []
+    assert "OMP_NUM_THREADS" not in os.environ
+
+
+def test_dry_run_skips_heavy_imports(tmp_path):
+    # Fresh interpreter: this test process has FAISS loaded already
+    code = (
+        "import sys; from backend.scripts.manage_index import main; "
+        f"main(['build', '--notes', {_notes(tmp_path)!r}, '--dry-run']); "
+        "print('faiss' in sys.modules, 'openai' in sys.modules)"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert out.stdout.split()[-2:] == ["False", "False"]
+
+
+def test_build_jobs_splits_threads_between_workers(tmp_path, monkeypatch):
+    from backend.rag import embedder, qa
+    from backend.scripts.manage_index import main
+
+    seen = {}
+
+    class PoolModel:
+        device = "cpu"
+
+        def start_multi_process_pool(self, devices):
+            seen["devices"] = devices
+            seen["env"] = {
+                name: os.environ.get(name)
+                for name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS")
+            }
+            return object()
+
+    def stop_pool():
+        embedder._pool = None
+
+    monkeypatch.setenv("FAISS_BUILD_THREADS", "8")
+    monkeypatch.setattr(embedder, "_pool", None)
+    monkeypatch.setattr(embedder, "get_model", lambda: PoolModel())
+    monkeypatch.setattr(embedder, "stop_embed_pool", stop_pool)
+    monkeypatch.setattr(qa, "build_knowledge_base_from_dir", lambda *a: True)
+
+    index_path = str(tmp_path / "index" / "jobs")
+    main(
+        ["build", "--notes", _notes(tmp_path), "--index-path", index_path]
+        + ["--jobs", "3"]
+    )
+
+    assert seen["devices"] == ["cpu"] * 3
+    assert seen["env"] == {"OMP_NUM_THREADS": "2", "MKL_NUM_THREADS": "2"}
+    # The parent keeps all cores for FAISS training and adds
+    assert os.environ["OMP_NUM_THREADS"] == "8"
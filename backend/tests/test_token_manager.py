@@ -1,4 +1,14 @@
-from backend.rag.token_manager import estimate_tokens, truncate_chunks_by_tokens
+import pytest
+
+import backend.rag.qa as qa
+from backend.rag.prompt import build_prompt
+from backend.rag import token_manager
+from backend.rag.token_manager import (
+    RESERVED_TOKENS,
+    count_tokens,
+    estimate_tokens,
+    truncate_chunks_by_tokens,
+)
 
 
 def test_estimate_tokens_basic():
@@ -17,3 +27,48 @@ def test_truncate_chunks_by_tokens():
     # Should include first (25) and second (50) would overflow, so only first
     assert len(truncated) >= 1
     assert truncated[0] == chunks[0]
+
+
+def test_fitted_prompt_stays_within_budget(monkeypatch):
+    question = "What is a heap?"
+    chunks = [f"chunk {i} " + "word " * (40 + 7 * i) for i in range(30)]
+    counts = count_tokens(chunks)
+    full = estimate_tokens(build_prompt(question, chunks))
+    # Every limit from "no chunks fit" to "all chunks fit"
+    for room in range(0, full + 1, 3):
+        limit = RESERVED_TOKENS + room
+        monkeypatch.setattr(qa, "get_token_limit", lambda model: limit)
+
+        context = qa._fit_context(question, chunks, counts)
+
+        assert context == chunks[: len(context)]
+        prompt = build_prompt(question, context)
+        assert estimate_tokens(prompt) <= limit - RESERVED_TOKENS or not context
+
+
+def test_tiktoken_counts_match_encoder():
+    tiktoken = pytest.importorskip("tiktoken")
+    enc = token_manager._get_encoding(token_manager.MODEL_NAME)
+    if enc is None:
+        pytest.skip("tiktoken BPE file not cached and not downloadable")
+    assert isinstance(enc, tiktoken.Encoding)
+
+    texts = ["hello world", "", "Dijkstra's algorithm uses a priority queue."]
+    expected = [len(enc.encode_ordinary(t)) for t in texts]
+    assert count_tokens(texts).tolist() == expected
+    assert estimate_tokens(texts[2]) == expected[2]
+    assert truncate_chunks_by_tokens(texts, expected[0]) == texts[:2]
+
+
+def test_unavailable_encoding_falls_back_to_heuristic(monkeypatch):
+    class OfflineTiktoken:
+        def encoding_for_model(self, model):
+            raise OSError("no network")
+
+    monkeypatch.setattr(token_manager, "tiktoken", OfflineTiktoken())
+    token_manager._get_encoding.cache_clear()
+    try:
+        assert token_manager._get_encoding("some-model") is None
+        assert count_tokens(["a" * 40]).tolist() == [10]
+    finally:
+        token_manager._get_encoding.cache_clear()
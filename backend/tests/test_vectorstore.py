@@ -0,0 +1,153 @@
+import gc
+import pickle
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import faiss
+import numpy as np
+
+from backend.rag import vectorstore
+from backend.rag.vectorstore import MmapTexts, VectorStore
+
+
+def test_save_and_load_roundtrip(tmp_path):
+    vs = VectorStore(dim=4)
+    vs.add(np.eye(4, dtype=np.float32), ["alpha", "béta", "", "delta"])
+
+    prefix = str(tmp_path / "index" / "course")
+    vs.save(prefix)
+    loaded = VectorStore.load(prefix)
+
+    assert isinstance(loaded.texts, MmapTexts)
+    assert len(loaded.texts) == 4
+    assert list(loaded.texts) == ["alpha", "béta", "", "delta"]
+    assert loaded.texts[-1] == "delta"
+    assert loaded.texts[1:3] == ["béta", ""]
+    assert loaded.search(np.eye(4, dtype=np.float32)[1], top_k=1) == ["béta"]
+    assert loaded.token_counts.tolist() == vs.token_counts.tolist()
+    assert loaded.chunk_token_counts(np.array([2]))[0] == 0
+
+
+def test_sq8_index_trains_on_first_add(monkeypatch):
+    monkeypatch.setattr(vectorstore, "INDEX_TYPE", "sq8")
+    vs = VectorStore(dim=4)
+    assert not vs.index.is_trained
+
+    vs.add(np.eye(4, dtype=np.float32), ["a", "b", "c", "d"])
+
+    assert vs.index.is_trained
+    assert vs.search(np.eye(4, dtype=np.float32)[2], top_k=1) == ["c"]
+
+
+def test_ivf_flat_uses_sqrt_n_lists(monkeypatch):
+    monkeypatch.setattr(vectorstore, "INDEX_TYPE", "ivf_flat")
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((10000, 8)).astype(np.float32)
+    vs = VectorStore(dim=8)
+    vs.add(vectors, [str(i) for i in range(len(vectors))])
+
+    assert isinstance(vs.index, faiss.IndexIVFFlat)
+    assert vs.index.nlist == 100
+    assert vs.index.nprobe == vectorstore.IVF_FLAT_NPROBE
+    assert vs.search(vectors[7], top_k=1) == ["7"]
+
+    small = VectorStore(dim=8)
+    small.add(vectors[:9999], [str(i) for i in range(9999)])
+    assert isinstance(small.index, faiss.IndexFlatIP)
+
+
+def test_ivf_sq8_keeps_shared_nprobe(monkeypatch):
+    monkeypatch.setattr(vectorstore, "INDEX_TYPE", "ivf_sq8")
+    vectors = np.random.default_rng(0).standard_normal((400, 8)).astype(np.float32)
+    vs = VectorStore(dim=8)
+    vs.add(vectors, [str(i) for i in range(len(vectors))])
+
+    assert isinstance(vs.index, faiss.IndexIVFScalarQuantizer)
+    assert vs.index.nprobe == vectorstore.IVF_NPROBE == 8
+
+
+def test_legacy_pickle_texts_are_converted(tmp_path):
+    prefix = str(tmp_path / "legacy")
+    index = faiss.IndexFlatL2(4)
+    index.add(np.eye(4, dtype=np.float32))
+    faiss.write_index(index, f"{prefix}.index")
+    with open(f"{prefix}_texts.pkl", "wb") as f:
+        pickle.dump(["a", "b", "c", "d"], f)
+
+    assert VectorStore.load(prefix).search(np.eye(4)[3], top_k=1) == ["d"]
+    assert isinstance(VectorStore.load(prefix).texts, MmapTexts)
+
+
+def test_failed_texts_conversion_keeps_legacy_pickle(tmp_path, monkeypatch):
+    prefix = str(tmp_path / "legacy")
+    index = faiss.IndexFlatL2(4)
+    index.add(np.eye(4, dtype=np.float32))
+    faiss.write_index(index, f"{prefix}.index")
+    with open(f"{prefix}_texts.pkl", "wb") as f:
+        pickle.dump(["a", "b", "c", "d"], f)
+
+    def disk_full(src, dst):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(vectorstore.os, "replace", disk_full)
+    assert VectorStore.load(prefix).search(np.eye(4)[3], top_k=1) == ["d"]
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "legacy.index",
+        "legacy_texts.pkl",
+    ]
+
+
+def test_batched_search_matches_direct_search(monkeypatch):
+    monkeypatch.setattr(vectorstore, "SEARCH_BATCH_WINDOW_MS", 20.0)
+    vs = VectorStore(dim=4)
+    assert vs._batcher is not None
+    vs.add(np.eye(4, dtype=np.float32), ["a", "b", "c", "d"])
+
+    with ThreadPoolExecutor(max_workers=4) as ex:
+        results = list(ex.map(lambda i: vs.search(np.eye(4)[i], top_k=1), range(4)))
+
+    assert results == [["a"], ["b"], ["c"], ["d"]]
+
+
+def test_replaced_batched_store_is_freed(monkeypatch):
+    monkeypatch.setattr(vectorstore, "SEARCH_BATCH_WINDOW_MS", 1.0)
+    vs = VectorStore(dim=4)
+    vs.add(np.eye(4, dtype=np.float32), ["a", "b", "c", "d"])
+    assert vs.search(np.eye(4)[1], top_k=1) == ["b"]
+    thread = vs._batcher._thread
+    ref = weakref.ref(vs)
+
+    vs = VectorStore(dim=4)
+    gc.collect()
+
+    assert ref() is None
+    thread.join(timeout=2)
+    assert not thread.is_alive()
+
+
+def test_compact_swaps_small_hnsw_for_flat(monkeypatch):
+    vs = VectorStore(dim=4)
+    vs.add(np.eye(4, dtype=np.float32), ["a", "b", "c", "d"])
+    assert isinstance(vs.index, faiss.IndexHNSWFlat)
+
+    moved = []
+    monkeypatch.setattr(
+        vectorstore, "_maybe_to_gpu", lambda index: moved.append(index) or index
+    )
+    vs.compact()
+
+    assert moved == [vs.index]
+    assert isinstance(vs.index, faiss.IndexFlat)
+    assert vs.index.ntotal == 4
+    assert vs.search(np.eye(4)[1], top_k=1) == ["b"]
+
+
+def test_search_batch_matches_single_searches():
+    vs = VectorStore(dim=4)
+    vs.add(np.eye(4, dtype=np.float32), ["a", "b", "c", "d"])
+
+    queries = np.eye(4, dtype=np.float32)[[3, 0]]
+
+    assert vs.search_batch(queries, top_k=1) == [["d"], ["a"]]
+    assert vs.search_batch(queries, top_k=1) == [vs.search(q, top_k=1) for q in queries]